@@ -0,0 +1,164 @@
+"""
+Tag cache: latency per tier and hit rate under a read/write mix.
+
+Seeds `--tags` tags, then times `TagService.get_tags` and
+`TagService.get_tag_by_uid` as an L1 hit, an L2 (Redis) hit, a miss (after
+an invalidation) and uncached, straight against the database. It then
+replays a workload at `--rate` requests per second for `--seconds`: every
+request reads the list or one tag (uids drawn with a Zipf-like skew), and
+`--writes` times per second a tag write invalidates the cache. Hits are
+counted per tier; misses are the loads that reached the database.
+
+    python -m bench.cache
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy import text
+
+import src.cache
+from bench.common import percentile, print_table
+from src.config import Config
+from src.db.main import dispose_engine, get_engine, init_db, new_session
+from src.db.redis import close_redis
+from src.tags.service import TagService, tag_cache
+
+BENCH_PREFIX = "bench-cache-tag-"
+
+tag_service = TagService()
+
+
+async def seed(tags: int) -> list[str]:
+    async with get_engine().begin() as conn:
+        await conn.execute(text(
+            "INSERT INTO tags (uid, name, book_count, created_at, update_at)"
+            " SELECT gen_random_uuid(), :prefix || i, 0, now(), now()"
+            " FROM generate_series(0, CAST(:n AS integer) - 1) i"
+            " WHERE NOT EXISTS (SELECT 1 FROM tags WHERE name = :prefix || i)"
+        ), {"prefix": BENCH_PREFIX, "n": tags})
+        result = await conn.execute(
+            text("SELECT uid FROM tags WHERE name LIKE :pattern ORDER BY name"),
+            {"pattern": BENCH_PREFIX + "%"},
+        )
+        return [str(uid) for uid, in result]
+
+
+async def sample(fn, before, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        await before()
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+async def latencies(tag_uid: str, repeat: int) -> list[dict]:
+    async def nothing():
+        pass
+
+    async def clear_l1():
+        tag_cache.l1.clear()
+
+    async def uncached(method, *args):
+        async with new_session() as session:
+            return await method.__wrapped__(tag_service, *args, session=session)
+
+    rows = []
+    for name, call, direct in (
+        ("get_tags", tag_service.get_tags, lambda: uncached(TagService.get_tags)),
+        (
+            "get_tag_by_uid",
+            lambda: tag_service.get_tag_by_uid(tag_uid),
+            lambda: uncached(TagService.get_tag_by_uid, tag_uid),
+        ),
+    ):
+        await call()
+        for tier, fn, before in (
+            ("L1 hit", call, nothing),
+            ("L2 hit", call, clear_l1),
+            ("miss", call, tag_cache.invalidate),
+            ("uncached", direct, nothing),
+        ):
+            samples = await sample(fn, before, repeat)
+            rows.append({
+                "method": name,
+                "path": tier,
+                "p50_us": round(percentile(samples, 0.5)),
+                "p95_us": round(percentile(samples, 0.95)),
+            })
+    return rows
+
+
+async def workload(tag_uids: list[str], rate: float, seconds: float, writes: float) -> dict:
+    rng = random.Random(7)
+    weights = [1 / (rank + 1) for rank in range(len(tag_uids))]
+    # L1 misses go through `load`; L2 misses open a session for the query.
+    loads = misses = 0
+    load = tag_cache.load
+
+    async def counted_load(*args, **kwargs):
+        nonlocal loads
+        loads += 1
+        return await load(*args, **kwargs)
+
+    def counted_session():
+        nonlocal misses
+        misses += 1
+        return new_session()
+
+    tag_cache.load = counted_load
+    src.cache.new_session = counted_session
+    await tag_cache.invalidate()
+    reads = invalidations = 0
+    start = time.perf_counter()
+    next_write = start
+    try:
+        while (now := time.perf_counter()) - start < seconds:
+            if writes and now >= next_write:
+                await tag_cache.invalidate()
+                invalidations += 1
+                next_write += 1 / writes
+            if rng.random() < 0.5:
+                await tag_service.get_tags()
+            else:
+                await tag_service.get_tag_by_uid(rng.choices(tag_uids, weights)[0])
+            reads += 1
+            await asyncio.sleep(max(0.0, start + reads / rate - time.perf_counter()))
+    finally:
+        del tag_cache.load
+        src.cache.new_session = new_session
+
+    return {
+        "reads": reads,
+        "invalidations": invalidations,
+        "l1_hit_pct": round((reads - loads) / reads * 100, 1),
+        "l2_hit_pct": round((loads - misses) / reads * 100, 1),
+        "miss_pct": round(misses / reads * 100, 1),
+    }
+
+
+async def main(args) -> None:
+    await init_db()
+    tag_uids = await seed(args.tags)
+    print_table(await latencies(tag_uids[0], args.repeat))
+    print()
+    print(f"workload: {args.rate:g} req/s for {args.seconds:g} s, {args.writes:g} writes/s,"
+          f" L1 TTL {Config.TAG_CACHE_L1_TTL_SECONDS} s")
+    print_table([await workload(tag_uids, args.rate, args.seconds, args.writes)])
+    await dispose_engine()
+    await close_redis()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tags", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=300)
+    parser.add_argument("--rate", type=float, default=200)
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--writes", type=float, default=0.2)
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,55 @@
+"""
+Helpers shared by the benchmark scripts.
+
+The scripts run against the database and Redis configured in `.env` (set
+`DB_SSL=false` for a local Postgres) and print one table of results. They
+create the tables they need and only ever write rows they seeded
+themselves, but are meant for a scratch database, never production.
+"""
+
+import gc
+import statistics
+import time
+import tracemalloc
+from typing import Awaitable, Callable, Sequence
+
+
+async def timed(fn: Callable[[], Awaitable], repeat: int = 5) -> dict:
+    """Median wall and CPU milliseconds of `repeat` runs of `fn`."""
+    wall, cpu = [], []
+    for _ in range(repeat):
+        gc.collect()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        await fn()
+        cpu.append(time.process_time() - cpu_start)
+        wall.append(time.perf_counter() - wall_start)
+    return {
+        "wall_ms": round(statistics.median(wall) * 1000, 1),
+        "cpu_ms": round(statistics.median(cpu) * 1000, 1),
+    }
+
+
+async def peak_memory(fn: Callable[[], Awaitable]) -> float:
+    """Peak Python heap growth in MiB while running `fn` once."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        await fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 2**20, 1)
+
+
+def percentile(samples: Sequence[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def print_table(rows: list[dict]) -> None:
+    columns = list(rows[0])
+    widths = [max(len(str(c)), *(len(str(row[c])) for row in rows)) for c in columns]
+    print("  ".join(str(c).ljust(w) for c, w in zip(columns, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(str(row[c]).ljust(w) for c, w in zip(columns, widths)))
@@ -0,0 +1,110 @@
+"""
+CPU cost vs compressed size of gzip levels and brotli qualities.
+
+Compresses book list responses the way `CompressionMiddleware` does, a page
+of `DEFAULT_PAGE_SIZE` books, a full `MAX_PAGE_SIZE` page and a 1000-book
+`GET /books/user/{user_uid}` listing, and reports the compressed size and
+the CPU time per response for every gzip level (1-9) and brotli quality
+(0-11). No database is needed: the books are generated.
+
+    python -m bench.compression
+"""
+
+import argparse
+import gzip
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from typing import List
+
+from pydantic import TypeAdapter
+
+from bench.common import print_table
+from src.books.schemas import Book, BookPageModel
+from src.compression import brotli
+from src.db.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+WORDS = (
+    "night garden river stone shadow empire letters winter house city sea "
+    "glass silent last little secret history song fire road kingdom light "
+    "memory island wild lost north summer daughter war house dream"
+).split()
+LANGUAGES = ("en", "en", "en", "fr", "de", "es")
+
+
+def make_books(n: int, rng: random.Random) -> list[Book]:
+    now = datetime(2026, 10, 1, 12)
+    return [
+        Book(
+            uid=uuid.UUID(int=rng.getrandbits(128), version=4),
+            title=" ".join(rng.choice(WORDS).title() for _ in range(rng.randint(1, 5))),
+            author=f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()}son",
+            publisher=f"{rng.choice(WORDS).title()} Press",
+            published_date=date(1950, 1, 1) + timedelta(days=rng.randrange(27000)),
+            page_count=rng.randint(80, 1200),
+            language=rng.choice(LANGUAGES),
+            created_at=now - timedelta(seconds=rng.randrange(10**8)),
+            update_at=now - timedelta(seconds=rng.randrange(10**6)),
+        )
+        for _ in range(n)
+    ]
+
+
+def bodies() -> dict[str, bytes]:
+    rng = random.Random(42)
+    page = lambda n: BookPageModel(items=make_books(n, rng), next_cursor="x" * 40)
+    listing = TypeAdapter(List[Book])
+    return {
+        f"page of {DEFAULT_PAGE_SIZE}": page(DEFAULT_PAGE_SIZE).model_dump_json().encode(),
+        f"page of {MAX_PAGE_SIZE}": page(MAX_PAGE_SIZE).model_dump_json().encode(),
+        "list of 1000": listing.dump_json(make_books(1000, rng)),
+    }
+
+
+def cpu_per_call(fn, body: bytes, min_seconds: float, rounds: int = 5) -> float:
+    """
+    CPU microseconds per call: the best of `rounds` rounds, each making as
+    many calls as fit in `min_seconds / rounds`. The minimum is the least
+    disturbed by other work on the machine.
+    """
+    best = float("inf")
+    for _ in range(rounds):
+        calls, start = 0, time.process_time()
+        while (elapsed := time.process_time() - start) < min_seconds / rounds:
+            fn(body)
+            calls += 1
+        best = min(best, elapsed / calls)
+    return best * 1e6
+
+
+def codecs():
+    for level in range(1, 10):
+        yield f"gzip {level}", lambda body, level=level: gzip.compress(body, compresslevel=level)
+    if brotli is None:
+        print("brotli is not installed; skipping it")
+        return
+    for quality in range(0, 12):
+        yield f"br {quality}", lambda body, quality=quality: brotli.compress(body, quality=quality)
+
+
+def main(min_seconds: float) -> None:
+    payloads = bodies()
+    rows = []
+    for codec, compress in codecs():
+        row = {"codec": codec}
+        for name, body in payloads.items():
+            ratio = len(compress(body)) / len(body)
+            row[f"{name} %"] = round(ratio * 100, 1)
+            row[f"{name} us"] = round(cpu_per_call(compress, body, min_seconds))
+        rows.append(row)
+
+    print("raw bytes: " + ", ".join(f"{name} {len(body)}" for name, body in payloads.items()))
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--min-seconds", type=float, default=1.0, help="CPU time to spend per cell")
+    args = parser.parse_args()
+    main(args.min_seconds)
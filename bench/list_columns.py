@@ -0,0 +1,137 @@
+"""
+Column-only list queries vs hydrating full ORM entities.
+
+Seeds one user with `--rows` books (each with a tag, every fourth with a
+review) and lists them the way `GET /books/user/{user_uid}` does: through
+`BookService.get_user_books`, which selects the `Book` schema's columns as
+plain rows, and through the `select(Book)` query it replaced, which builds
+an ORM instance per row and selectin-loads its reviews and tags. Each path
+is measured with and without serializing the result to JSON.
+
+    python -m bench.list_columns --rows 100000
+"""
+
+import argparse
+import asyncio
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import text
+from sqlmodel import select
+
+from bench.common import peak_memory, print_table, timed
+from src.books.schemas import Book as BookSchema
+from src.books.service import BookService
+from src.db.main import dispose_engine, get_engine, init_db, new_session
+from src.db.models import Book
+
+BENCH_EMAIL = "bench-list@bookly.local"
+BENCH_TAGS = 50
+
+books_adapter = TypeAdapter(List[BookSchema])
+book_service = BookService()
+
+
+async def seed(rows: int):
+    """Create the bench user and top its books up to `rows`; returns its uid."""
+    async with get_engine().begin() as conn:
+        user_uid = (await conn.execute(
+            text("SELECT uid FROM users WHERE email = :email"), {"email": BENCH_EMAIL}
+        )).scalar()
+        if user_uid is None:
+            user_uid = (await conn.execute(text(
+                "INSERT INTO users (uid, username, email, first_name, last_name, role,"
+                " is_verified, password_hash, created_at, update_at)"
+                " VALUES (gen_random_uuid(), 'bench', :email, 'Bench', 'User', 'user',"
+                " true, '', now(), now()) RETURNING uid"
+            ), {"email": BENCH_EMAIL})).scalar()
+            await conn.execute(text(
+                "INSERT INTO tags (uid, name, book_count, created_at, update_at)"
+                " SELECT gen_random_uuid(), 'bench-tag-' || i, 0, now(), now()"
+                " FROM generate_series(0, :n - 1) i"
+            ), {"n": BENCH_TAGS})
+
+        existing = (await conn.execute(
+            text("SELECT count(*) FROM books WHERE user_uid = :user"), {"user": user_uid}
+        )).scalar()
+        if existing >= rows:
+            return user_uid
+
+        await conn.execute(text(
+            "INSERT INTO books (uid, title, author, publisher, published_date,"
+            " page_count, language, user_uid, created_at, update_at)"
+            " SELECT gen_random_uuid(), 'Book ' || i, 'Author ' || i % 500,"
+            " 'Publisher ' || i % 50, date '2000-01-01' + i % 8000, 100 + i % 900,"
+            " (ARRAY['en', 'fr', 'de', 'es'])[1 + i % 4], :user,"
+            " now() - i * interval '1 second', now()"
+            " FROM generate_series(CAST(:start AS integer), CAST(:stop AS integer)) i"
+        ), {"user": user_uid, "start": existing + 1, "stop": rows})
+        await conn.execute(text(
+            "INSERT INTO booktag (book_id, tag_id)"
+            " SELECT b.uid, t.uid FROM books b"
+            " JOIN tags t ON t.name = 'bench-tag-' || abs(hashtext(b.uid::text)) % :tags"
+            " WHERE b.user_uid = :user"
+            " AND NOT EXISTS (SELECT 1 FROM booktag bt WHERE bt.book_id = b.uid)"
+        ), {"user": user_uid, "tags": BENCH_TAGS})
+        await conn.execute(text(
+            "INSERT INTO reviews (uid, rating, review_text, user_uid, book_uid, created_at, update_at)"
+            " SELECT gen_random_uuid(), 3, 'Fine.', :user, b.uid, now(), now()"
+            " FROM books b WHERE b.user_uid = :user AND abs(hashtext(b.uid::text)) % 4 = 0"
+            " AND NOT EXISTS (SELECT 1 FROM reviews r WHERE r.book_uid = b.uid)"
+        ), {"user": user_uid})
+    return user_uid
+
+
+def orm_path(user_uid):
+    async def query():
+        async with new_session() as session:
+            result = await session.exec(
+                select(Book).where(Book.user_uid == user_uid).order_by(Book.created_at.desc())
+            )
+            return result.all()
+
+    return query
+
+
+def column_path(user_uid):
+    async def query():
+        async with new_session() as session:
+            return await book_service.get_user_books(user_uid, session)
+
+    return query
+
+
+def serialized(query):
+    async def run():
+        books = await query()
+        return books_adapter.dump_json(books_adapter.validate_python(books, from_attributes=True))
+
+    return run
+
+
+async def main(rows: int, repeat: int) -> None:
+    await init_db()
+    user_uid = await seed(rows)
+
+    results = []
+    for name, query in (("orm entities", orm_path(user_uid)), ("schema columns", column_path(user_uid))):
+        for stage, fn in (("query", query), ("query + json", serialized(query))):
+            await fn()  # warm the pool and the statement caches
+            results.append({
+                "path": name,
+                "stage": stage,
+                "rows": len(await query()),
+                **await timed(fn, repeat),
+                "peak_mib": await peak_memory(fn),
+            })
+
+    print_table(results)
+    await dispose_engine()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
@@ -0,0 +1,189 @@
+"""
+Transactional mail latency while the bulk mail queue is saturated.
+
+Starts an SMTP sink in this process that takes `--smtp-delay` seconds per
+message, like a slow relay, and Celery workers that deliver to it. It queues
+`--bulk-sends` personalised bulk sends of `--batch` recipients each, waits
+until the bulk workers are busy, then sends `--mails` transactional mails
+one every `--interval` seconds and measures how long each takes from
+`.delay()` to arriving at the sink.
+
+Two worker layouts with the same number of worker processes are compared:
+the dedicated transactional and bulk workers of `runworker.sh`, and one
+shared worker consuming both queues, as before the queues were split.
+
+    python -m bench.mail_flood
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from bench.common import percentile, print_table
+from src.celery_tasks import BULK_MAIL_QUEUE, TRANSACTIONAL_MAIL_QUEUE, send_bulk_email, send_email
+from src.db.redis import get_sync_redis
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Layout -> the workers it runs, as (queues, concurrency).
+LAYOUTS = {
+    "dedicated": [(f"{TRANSACTIONAL_MAIL_QUEUE},celery", 1), (BULK_MAIL_QUEUE, 2)],
+    "shared": [(f"{TRANSACTIONAL_MAIL_QUEUE},{BULK_MAIL_QUEUE},celery", 3)],
+}
+
+
+class SmtpSink:
+    """Accepts any mail and records when each recipient's message arrived."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.delivered: dict[str, float] = {}
+        self.server = None
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self.session, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        def reply(line: str):
+            writer.write(f"{line}\r\n".encode())
+
+        recipients = []
+        reply("220 bench sink")
+        try:
+            while line := await reader.readline():
+                command = line.decode(errors="replace").strip()
+                verb = command[:4].upper()
+                if verb == "EHLO":
+                    reply("250-bench sink")
+                    reply("250 8BITMIME")
+                elif verb == "RCPT":
+                    recipients.append(command.split(":", 1)[1].strip(" <>").lower())
+                    reply("250 OK")
+                elif verb == "DATA":
+                    reply("354 End data with <CR><LF>.<CR><LF>")
+                    await writer.drain()
+                    while await reader.readline() not in (b".\r\n", b""):
+                        pass
+                    await asyncio.sleep(self.delay)
+                    now = time.perf_counter()
+                    for recipient in recipients:
+                        self.delivered[recipient] = now
+                    recipients = []
+                    reply("250 OK queued")
+                elif verb == "QUIT":
+                    reply("221 Bye")
+                    break
+                else:
+                    reply("250 OK")
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def wait_for(self, recipients: list[str], timeout: float) -> None:
+        deadline = time.perf_counter() + timeout
+        while not all(r in self.delivered for r in recipients):
+            if time.perf_counter() > deadline:
+                raise TimeoutError(f"mail to {recipients} never arrived")
+            await asyncio.sleep(0.01)
+
+
+def start_workers(layout: str, smtp_port: int) -> list[subprocess.Popen]:
+    env = {
+        **os.environ,
+        "MAIL_SERVER": "127.0.0.1",
+        "MAIL_PORT": str(smtp_port),
+        "MAIL_STARTTLS": "false",
+        "MAIL_SSL_TLS": "false",
+        "USE_CREDENTIALS": "false",
+        "VALIDATE_CERTS": "false",
+    }
+    return [
+        subprocess.Popen(
+            [
+                sys.executable, "-m", "celery", "-A", "src.celery_tasks.c_app", "worker",
+                "-Q", queues, "-n", f"bench{n}@%h", f"--concurrency={concurrency}",
+                "--loglevel=ERROR",
+            ],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+        )
+        for n, (queues, concurrency) in enumerate(LAYOUTS[layout])
+    ]
+
+
+def purge_queues() -> None:
+    get_sync_redis().delete(TRANSACTIONAL_MAIL_QUEUE, BULK_MAIL_QUEUE)
+
+
+async def run(layout: str, args) -> dict:
+    sink = SmtpSink(args.smtp_delay)
+    port = await sink.start()
+    purge_queues()
+    workers = start_workers(layout, port)
+    try:
+        # Wait until both queues are being consumed.
+        await asyncio.to_thread(send_email.delay, "welcome", ["warm-tx@bench.example.com"], {})
+        await asyncio.to_thread(send_bulk_email.delay, "welcome", ["warm-bulk@bench.example.com"], {})
+        await sink.wait_for(["warm-tx@bench.example.com", "warm-bulk@bench.example.com"], timeout=120)
+
+        for send in range(args.bulk_sends):
+            recipients = [f"bulk-{send}-{n}@bench.example.com" for n in range(args.batch)]
+            personal = {r: {} for r in recipients}
+            await asyncio.to_thread(send_bulk_email.delay, "welcome", recipients, {}, personal)
+        await sink.wait_for(["bulk-0-0@bench.example.com"], timeout=60)
+
+        flood_start = time.perf_counter()
+        queued = {}
+        for n in range(args.mails):
+            recipient = f"tx-{n}@bench.example.com"
+            queued[recipient] = time.perf_counter()
+            await asyncio.to_thread(send_email.delay, "verify_email", [recipient], {"link": "x"})
+            await asyncio.sleep(args.interval)
+        await sink.wait_for(list(queued), timeout=600)
+        flood_ms = (time.perf_counter() - flood_start) * 1000
+
+        latencies = [(sink.delivered[r] - t) * 1000 for r, t in queued.items()]
+        bulk_sent = sum(
+            1 for r, t in sink.delivered.items() if r.startswith("bulk-") and t >= flood_start
+        )
+        return {
+            "layout": layout,
+            "workers": " + ".join(str(c) for _, c in LAYOUTS[layout]),
+            "tx_p50_ms": round(percentile(latencies, 0.5)),
+            "tx_p95_ms": round(percentile(latencies, 0.95)),
+            "tx_max_ms": round(max(latencies)),
+            "bulk_sent_during": bulk_sent,
+            "bulk_per_s": round(bulk_sent / (flood_ms / 1000), 1),
+        }
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait()
+        purge_queues()
+        await sink.stop()
+
+
+async def main(args) -> None:
+    print_table([await run(layout, args) for layout in args.layout])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--layout", action="append", choices=list(LAYOUTS))
+    parser.add_argument("--bulk-sends", type=int, default=40)
+    parser.add_argument("--batch", type=int, default=50)
+    parser.add_argument("--mails", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.5)
+    parser.add_argument("--smtp-delay", type=float, default=0.05)
+    args = parser.parse_args()
+    args.layout = args.layout or list(LAYOUTS)
+    asyncio.run(main(args))
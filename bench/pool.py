@@ -0,0 +1,113 @@
+"""
+Connection checkout latency: pre-ping vs idle ping vs no ping, queue vs null pool.
+
+Each variant runs `--requests` sequential `SELECT 1` requests the way a
+route does (check a connection out, run one statement, return it) and
+reports the median and 95th percentile. It then measures checkouts after the
+connection sat idle for longer than `--idle-seconds` (the idle-ping
+threshold), and whether a request still succeeds after the server dropped
+every pooled connection while they were idle.
+
+    python -m bench.pool
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from bench.common import percentile, print_table
+from src.config import Config
+from src.db.main import connect_args, ping_idle_connections, pool_args
+
+APPLICATION_NAME = "bookly-bench-pool"
+
+
+def make_engine(variant: str):
+    args = {**connect_args(), "server_settings": {"application_name": APPLICATION_NAME}}
+    if variant == "null pool":
+        return create_async_engine(Config.DATABASE_URL, connect_args=args, poolclass=NullPool)
+
+    engine = create_async_engine(
+        Config.DATABASE_URL,
+        connect_args=args,
+        **{**pool_args(), "pool_pre_ping": variant == "queue, pre-ping"},
+    )
+    if variant == "queue, idle ping":
+        ping_idle_connections(engine)
+    return engine
+
+
+VARIANTS = ("queue, pre-ping", "queue, idle ping", "queue, no ping", "null pool")
+
+
+async def request(engine) -> float:
+    start = time.perf_counter()
+    async with engine.connect() as conn:
+        await conn.exec_driver_sql("SELECT 1")
+    return (time.perf_counter() - start) * 1000
+
+
+async def drop_bench_connections(admin) -> None:
+    async with admin.connect() as conn:
+        await conn.execute(
+            text(
+                "SELECT pg_terminate_backend(pid) FROM pg_stat_activity"
+                " WHERE application_name = :name AND pid <> pg_backend_pid()"
+            ),
+            {"name": APPLICATION_NAME},
+        )
+
+
+async def measure(variant: str, requests: int, idle_seconds: float, idle_samples: int, admin) -> dict:
+    engine = make_engine(variant)
+    try:
+        await request(engine)  # open the pool's first connection
+        steady = [await request(engine) for _ in range(requests)]
+
+        after_idle = []
+        for _ in range(idle_samples):
+            await asyncio.sleep(idle_seconds * 1.1)
+            after_idle.append(await request(engine))
+
+        await drop_bench_connections(admin)
+        await asyncio.sleep(idle_seconds * 1.1)
+        try:
+            await request(engine)
+            recovers = "yes"
+        except Exception as e:
+            recovers = f"no ({type(e).__name__})"
+    finally:
+        await engine.dispose()
+
+    return {
+        "variant": variant,
+        "p50_ms": round(percentile(steady, 0.5), 3),
+        "p95_ms": round(percentile(steady, 0.95), 3),
+        "after_idle_p50_ms": round(percentile(after_idle, 0.5), 3),
+        "survives_dropped_connections": recovers,
+    }
+
+
+async def main(args) -> None:
+    Config.DB_PING_IDLE_SECONDS = args.idle_seconds
+    admin = create_async_engine(Config.DATABASE_URL, connect_args=connect_args(), poolclass=NullPool)
+    rows = []
+    try:
+        for variant in VARIANTS:
+            rows.append(await measure(variant, args.requests, args.idle_seconds, args.idle_samples, admin))
+    finally:
+        await admin.dispose()
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--idle-seconds", type=float, default=1.0)
+    parser.add_argument("--idle-samples", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,86 @@
+"""
+Latency the rate limiter adds to an allowed request.
+
+Calls the `RateLimiter` dependency directly, as FastAPI does for a route,
+with a bucket large enough that every request is allowed. A request is
+either admitted from the worker's local estimate (`local hit`) or charged
+in Redis with the token-bucket script (`redis`); the second limiter has
+local admission turned off, like the small login scope. Clients are keyed
+by IP or by the user of a bearer token, which is decoded on every request.
+
+    python -m bench.ratelimit
+"""
+
+import argparse
+import asyncio
+import time
+
+from starlette.requests import Request
+
+from bench.common import percentile, print_table
+from src.auth.utils import create_access_token
+from src.config import Config
+from src.db.redis import close_redis
+from src.ratelimit import RateLimiter
+
+SCOPE = "bench:ratelimit"
+
+
+def make_request(token: str = None) -> Request:
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    return Request({"type": "http", "headers": headers, "client": ("10.0.0.1", 40000)})
+
+
+async def measure(limiter: RateLimiter, request: Request, calls: int) -> dict:
+    await limiter(request)  # load the script and take the first sync
+    script = limiter.script
+    synced = 0
+
+    async def counted_script(*args, **kwargs):
+        nonlocal synced
+        synced += 1
+        return await script(*args, **kwargs)
+
+    limiter.script = counted_script
+    local, remote = [], []
+    for _ in range(calls):
+        before = synced
+        start = time.perf_counter()
+        await limiter(request)
+        elapsed = (time.perf_counter() - start) * 1e6
+        (remote if synced > before else local).append(elapsed)
+
+    row = {}
+    for path, samples in (("local hit", local), ("redis", remote)):
+        row[f"{path} n"] = len(samples)
+        row[f"{path} p50 us"] = round(percentile(samples, 0.5)) if samples else "-"
+        row[f"{path} p95 us"] = round(percentile(samples, 0.95)) if samples else "-"
+    return row
+
+
+async def main(calls: int) -> None:
+    Config.RATE_LIMITS[SCOPE] = "10000000/minute"
+    token = create_access_token({"email": "bench@example.com", "user_uid": "bench", "role": "user"})
+
+    rows = []
+    for local_admission in (True, False):
+        for keyed_by, request, per in (
+            ("ip", make_request(), "ip"),
+            ("user token", make_request(token), "user"),
+        ):
+            limiter = RateLimiter(SCOPE, per=per)
+            limiter.local_admission = local_admission
+            rows.append({
+                "local admission": "on" if local_admission else "off",
+                "keyed by": keyed_by,
+                **await measure(limiter, request, calls),
+            })
+    print_table(rows)
+    await close_redis()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(main(args.calls))
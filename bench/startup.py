@@ -0,0 +1,106 @@
+"""
+Cold start of an API worker: importing `src.main` and running the lifespan.
+
+Each run is a fresh interpreter started with `-X importtime`. It reports
+how long `import src.main` took, how many modules it loaded, and how long
+the app's lifespan startup took (opening and warming the DB pool, Redis and
+the broker connection). With `--baseline REV` (repeatable) the same probe
+also runs against a temporary git worktree of that revision, for a
+before/after comparison.
+
+    python -m bench.startup --baseline df613c3
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench.common import print_table
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import asyncio, json, time
+start = time.perf_counter()
+import src.main
+app = src.main.app
+imported = time.perf_counter()
+
+async def startup():
+    async with app.router.lifespan_context(app):
+        return time.perf_counter()
+
+ready = asyncio.run(startup())
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "startup_ms": (ready - imported) * 1000,
+}))
+"""
+
+
+def probe(tree: Path) -> dict:
+    begin = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=tree,
+        env=os.environ,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode:
+        sys.exit(f"Probe failed in {tree}:\n{result.stderr[-2000:]}")
+    process_ms = (time.perf_counter() - begin) * 1000
+
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    imports = [line for line in result.stderr.splitlines() if line.startswith("import time:")]
+    return {
+        **timings,
+        "process_ms": process_ms,
+        "modules": len(imports) - 1,  # minus the header line
+    }
+
+
+def measure(name: str, tree: Path, runs: int) -> dict:
+    probe(tree)  # compile bytecode and warm the OS file cache
+    samples = [probe(tree) for _ in range(runs)]
+    row = {"tree": name}
+    for field in ("import_ms", "startup_ms", "process_ms"):
+        row[field] = round(statistics.median(s[field] for s in samples), 1)
+    row["modules"] = samples[0]["modules"]
+    return row
+
+
+def main(baselines: list[str], runs: int) -> None:
+    rows = []
+    for revision in baselines:
+        with tempfile.TemporaryDirectory() as tmp:
+            tree = Path(tmp) / "baseline"
+            subprocess.run(
+                ["git", "worktree", "add", "--detach", str(tree), revision],
+                cwd=ROOT, check=True, capture_output=True,
+            )
+            try:
+                rows.append(measure(revision, tree, runs))
+            finally:
+                subprocess.run(
+                    ["git", "worktree", "remove", "--force", str(tree)],
+                    cwd=ROOT, check=True, capture_output=True,
+                )
+    rows.append(measure("working tree", ROOT, runs))
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--baseline", action="append", default=[], help="git revision to compare against (repeatable)"
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    main(args.baseline, args.runs)
@@ -0,0 +1,265 @@
+"""
+Statements and round trips per write: load-then-mutate vs single RETURNING.
+
+Runs each single-row write of the book, tag and review services both ways:
+`before` is the ORM code they replaced (load the row and its selectin
+relationships, mutate or `session.delete` it, commit, refresh), `after` is
+the current service method. Every run works on freshly seeded rows: a book
+with two tags and two reviews, a tag linked to three such books.
+
+Statements are counted with a `before_cursor_execute` listener; round trips
+add the BEGIN and COMMIT asyncpg sends for the transaction. The `after`
+paths of tags and reviews also invalidate caches and update Redis, which is
+part of their wall time but not of the counts.
+
+    python -m bench.writes
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from sqlalchemy import event, text, update
+from sqlmodel import select
+
+from bench.common import print_table
+from src.auth.service import UserService
+from src.books.schemas import BookUpdateModel
+from src.books.service import BookService
+from src.db.main import dispose_engine, get_engine, init_db, new_session
+from src.db.models import Book, Review, Tag
+from src.db.redis import close_redis
+from src.reviews.service import ReviewService
+from src.tags.schemas import TagCreateModel
+from src.tags.service import TagService
+
+BENCH_EMAIL = "bench-writes@bench.example.com"
+
+book_service = BookService()
+tag_service = TagService()
+review_service = ReviewService()
+user_service = UserService()
+
+
+class RoundTrips:
+    """Counts the statements and transaction round trips on the engine."""
+
+    def __init__(self) -> None:
+        self.statements = 0
+        self.transactions = 0
+        engine = get_engine().sync_engine
+        event.listen(engine, "before_cursor_execute", self.on_statement)
+        event.listen(engine, "begin", self.on_transaction)
+        event.listen(engine, "commit", self.on_transaction)
+        event.listen(engine, "rollback", self.on_transaction)
+
+    def on_statement(self, *args) -> None:
+        self.statements += 1
+
+    def on_transaction(self, *args) -> None:
+        self.transactions += 1
+
+    def snapshot(self) -> tuple[int, int]:
+        return self.statements, self.transactions
+
+
+# =========================
+# Seed data
+# =========================
+async def seed_user() -> uuid.UUID:
+    async with get_engine().begin() as conn:
+        user_uid = (await conn.execute(
+            text("SELECT uid FROM users WHERE email = :email"), {"email": BENCH_EMAIL}
+        )).scalar()
+        if user_uid is None:
+            user_uid = (await conn.execute(text(
+                "INSERT INTO users (uid, username, email, first_name, last_name, role,"
+                " is_verified, password_hash, created_at, update_at)"
+                " VALUES (gen_random_uuid(), 'bench-writes', :email, 'Bench', 'Writes', 'user',"
+                " true, '', now(), now()) RETURNING uid"
+            ), {"email": BENCH_EMAIL})).scalar()
+    return user_uid
+
+
+async def seed_book(user_uid: uuid.UUID, tag_uids: list = ()) -> dict:
+    """A book with two reviews and two tags of its own, plus `tag_uids`."""
+    async with get_engine().begin() as conn:
+        book_uid = (await conn.execute(text(
+            "INSERT INTO books (uid, title, author, publisher, published_date, page_count,"
+            " language, user_uid, created_at, update_at)"
+            " VALUES (gen_random_uuid(), 'Bench', 'Author', 'Press', date '2000-01-01', 100,"
+            " 'en', :user, now(), now()) RETURNING uid"
+        ), {"user": user_uid})).scalar()
+        own_tags = (await conn.execute(text(
+            "INSERT INTO tags (uid, name, book_count, created_at, update_at)"
+            " SELECT gen_random_uuid(), 'bench-writes-' || gen_random_uuid(), 1, now(), now()"
+            " FROM generate_series(1, 2) RETURNING uid"
+        ))).scalars().all()
+        for tag_uid in [*own_tags, *tag_uids]:
+            await conn.execute(
+                text("INSERT INTO booktag (book_id, tag_id) VALUES (:book, :tag)"),
+                {"book": book_uid, "tag": tag_uid},
+            )
+        review_uids = (await conn.execute(text(
+            "INSERT INTO reviews (uid, rating, review_text, user_uid, book_uid, created_at, update_at)"
+            " SELECT gen_random_uuid(), 4, 'Good.', :user, :book, now(), now()"
+            " FROM generate_series(1, 2) RETURNING uid"
+        ), {"user": user_uid, "book": book_uid})).scalars().all()
+    return {"book": book_uid, "tags": own_tags, "reviews": review_uids}
+
+
+async def seed_tag(user_uid: uuid.UUID) -> uuid.UUID:
+    """A tag linked to three books."""
+    async with get_engine().begin() as conn:
+        tag_uid = (await conn.execute(text(
+            "INSERT INTO tags (uid, name, book_count, created_at, update_at)"
+            " VALUES (gen_random_uuid(), 'bench-writes-' || gen_random_uuid(), 3, now(), now())"
+            " RETURNING uid"
+        ))).scalar()
+    for _ in range(3):
+        await seed_book(user_uid, [tag_uid])
+    return tag_uid
+
+
+# =========================
+# The replaced implementations
+# =========================
+async def update_book_before(book_uid, data: BookUpdateModel, session):
+    result = await session.exec(select(Book).where(Book.uid == book_uid))
+    book = result.first()
+    for k, v in data.model_dump(exclude_unset=True).items():
+        setattr(book, k, v)
+    await session.commit()
+    await session.refresh(book)
+    return book
+
+
+async def delete_book_before(book_uid, session):
+    result = await session.exec(select(Book).where(Book.uid == book_uid))
+    book = result.first()
+    if book.tags:
+        await session.exec(
+            update(Tag)
+            .where(Tag.uid.in_([tag.uid for tag in book.tags]))
+            .values(book_count=Tag.book_count - 1)
+        )
+    await session.delete(book)
+    await session.commit()
+
+
+async def update_tag_before(tag_uid, data: TagCreateModel, session):
+    result = await session.exec(select(Tag).where(Tag.uid == tag_uid))
+    tag = result.first()
+    for k, v in data.model_dump().items():
+        setattr(tag, k, v)
+        await session.commit()
+        await session.refresh(tag)
+    return tag
+
+
+async def delete_tag_before(tag_uid, session):
+    result = await session.exec(select(Tag).where(Tag.uid == tag_uid))
+    tag = result.first()
+    await session.delete(tag)
+    await session.commit()
+
+
+async def delete_review_before(review_uid, user_email, session):
+    # The original compared `review.user` (a lazy load, which fails under
+    # asyncio) and never awaited `session.delete`; this is what it meant.
+    user = await user_service.get_user_by_email(user_email, session)
+    result = await session.exec(select(Review).where(Review.uid == review_uid))
+    review = result.first()
+    assert review.user_uid == user.uid
+    await session.delete(review)
+    await session.commit()
+
+
+# =========================
+# Operations
+# =========================
+def operations(user_uid):
+    async def book_target():
+        return (await seed_book(user_uid))["book"]
+
+    async def tag_target():
+        return await seed_tag(user_uid)
+
+    async def review_target():
+        return (await seed_book(user_uid))["reviews"][0]
+
+    new_title = lambda: BookUpdateModel(title=f"Bench {uuid.uuid4().hex[:8]}")
+    new_name = lambda: TagCreateModel(name=f"bench-writes-{uuid.uuid4()}")
+
+    return {
+        "update_book": (
+            book_target,
+            lambda uid, s: update_book_before(uid, new_title(), s),
+            lambda uid, s: book_service.update_book(uid, new_title(), s),
+        ),
+        "delete_book": (
+            book_target,
+            delete_book_before,
+            book_service.delete_book,
+        ),
+        "update_tag": (
+            tag_target,
+            lambda uid, s: update_tag_before(uid, new_name(), s),
+            lambda uid, s: tag_service.update_tag(uid, new_name(), s),
+        ),
+        "delete_tag": (
+            tag_target,
+            delete_tag_before,
+            tag_service.delete_tag,
+        ),
+        "delete_review": (
+            review_target,
+            lambda uid, s: delete_review_before(uid, BENCH_EMAIL, s),
+            lambda uid, s: review_service.delete_review_to_from_book(uid, BENCH_EMAIL, s),
+        ),
+    }
+
+
+async def measure(counter: RoundTrips, target, write, repeat: int) -> dict:
+    statements, round_trips, wall = [], [], []
+    for _ in range(repeat + 1):
+        uid = await target()
+        async with new_session() as session:
+            before = counter.snapshot()
+            start = time.perf_counter()
+            await write(uid, session)
+            elapsed = (time.perf_counter() - start) * 1000
+            after = counter.snapshot()
+        statements.append(after[0] - before[0])
+        round_trips.append(after[0] - before[0] + after[1] - before[1])
+        wall.append(elapsed)
+    # The first run warms the prepared statement caches.
+    statements, round_trips, wall = statements[1:], round_trips[1:], wall[1:]
+    return {
+        "statements": statistics.median(statements),
+        "round_trips": statistics.median(round_trips),
+        "wall_ms": round(statistics.median(wall), 2),
+    }
+
+
+async def main(repeat: int) -> None:
+    await init_db()
+    user_uid = await seed_user()
+    counter = RoundTrips()
+
+    rows = []
+    for name, (target, before, after) in operations(user_uid).items():
+        for variant, write in (("before", before), ("after", after)):
+            rows.append({"write": name, "variant": variant, **await measure(counter, target, write, repeat)})
+    print_table(rows)
+    await dispose_engine()
+    await close_redis()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.repeat))
@@ -1,4 +1,13 @@
 
-celery -A src.celery_tasks.c_app worker --loglevel=INFO &
+# Transactional mail (and the default queue) get their own worker so bulk
+# sends and background jobs can never hold them up.
+celery -A src.celery_tasks.c_app worker -Q mail.transactional,celery -n transactional@%h --loglevel=INFO &
+
+celery -A src.celery_tasks.c_app worker -Q mail.bulk -n bulk@%h --concurrency=2 --loglevel=INFO &
+
+celery -A src.celery_tasks.c_app worker -Q reviews.feed -n feed@%h --concurrency=2 --loglevel=INFO &
+
+# Similar-books jobs run one at a time; this worker also runs the scheduler.
+celery -A src.celery_tasks.c_app worker -Q books.similar --beat -n similar@%h --concurrency=1 --loglevel=INFO &
 
 celery -A src.celery_tasks.c_app flower --port=5555
@@ -1,47 +1,12 @@
-from fastapi import FastAPI
-from src.auth.routes import auth_router
-from src.books.routes import book_router
-from src.reviews.routes import review_router
-from src.tags.routes import tags_router
-from .errors import register_all_errors
-from .middleware import register_middleware
+# The application lives in `src.main`. It is resolved lazily so that
+# importing any `src.*` module (e.g. from the Celery worker or Alembic) does
+# not build the whole FastAPI app; `uvicorn src:app` and `fastapi dev src/`
+# keep working.
 
 
-version = "v1"
+def __getattr__(name):
+    if name == "app":
+        from src.main import app
 
-description = """
-A REST API for a book review web service.
-
-This REST API is able to;
-- Create Read Update And delete books
-- Add reviews to books
-- Add tags to Books e.t.c.
-    """
-
-version_prefix =f"/api/{version}"
-
-app = FastAPI(
-    title="Bookly",
-    description=description,
-    version=version,
-    license_info={"name": "MIT License", "url": "https://opensource.org/license/mit"},
-    contact={
-        "name": "Ssali Jonathan",
-        "url": "https://github.com/jod35",
-        "email": "ssalijonathank@gmail.com",
-    },
-    terms_of_service="httpS://example.com/tos",
-    openapi_url=f"{version_prefix}/openapi.json",
-    docs_url=f"{version_prefix}/docs",
-    redoc_url=f"{version_prefix}/redoc"
-)
-
-register_all_errors(app)
-
-register_middleware(app)
-
-
-app.include_router(book_router, prefix=f"{version_prefix}/books", tags=["books"])
-app.include_router(auth_router, prefix=f"{version_prefix}/auth", tags=["auth"])
-app.include_router(review_router, prefix=f"{version_prefix}/reviews", tags=["reviews"])
-app.include_router(tags_router, prefix=f"{version_prefix}/tags", tags=["tags"])
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,112 @@
+import asyncio
+import time
+
+from src.config import Config
+
+# Endpoints that never touch the database pool are not subject to admission.
+EXEMPT_PATHS = frozenset(
+    {
+        "/",
+        "/health",
+        "/ready",
+        "/docs",
+        "/redoc",
+        "/openapi.json",
+        "/api/v1/metrics",
+        "/api/v1/auth/send_mail",
+        "/api/v1/auth/password-reset-request",
+    }
+)
+
+
+class AdmissionController:
+    """
+    Caps in-flight DB-bound requests per worker and sheds load CoDel-style.
+
+    Requests wait for one of `max_in_flight` slots. While queue waits stay
+    under `target`, everything is admitted. Once every wait has exceeded
+    `target` for a full `interval`, the controller enters a dropping state in
+    which requests that cannot get a slot immediately are shed; the first
+    request admitted without queueing too long leaves that state again.
+    """
+
+    def __init__(
+        self, max_in_flight: int, target: float, interval: float, max_wait: float
+    ) -> None:
+        self.max_in_flight = max_in_flight
+        self.target = target
+        self.interval = interval
+        self.max_wait = max_wait
+
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._first_above_time = 0.0
+        self._dropping = False
+
+        self.in_flight = 0
+        self.admitted = 0
+        self.shed = 0
+
+    async def acquire(self) -> bool:
+        """Wait for a slot; return False if the request should be shed."""
+        if self._slots.locked():
+            if self._dropping:
+                self.shed += 1
+                return False
+
+            start = time.monotonic()
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.max_wait)
+            except asyncio.TimeoutError:
+                self._observe(self.max_wait)
+                self.shed += 1
+                return False
+            self._observe(time.monotonic() - start)
+        else:
+            await self._slots.acquire()
+            self._observe(0.0)
+
+        self.in_flight += 1
+        self.admitted += 1
+        return True
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._slots.release()
+
+    def _observe(self, wait: float) -> None:
+        if wait < self.target:
+            self._first_above_time = 0.0
+            self._dropping = False
+            return
+
+        now = time.monotonic()
+        if not self._first_above_time:
+            self._first_above_time = now + self.interval
+        elif now >= self._first_above_time:
+            self._dropping = True
+
+    def stats(self) -> dict:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "dropping": self._dropping,
+        }
+
+
+def max_in_flight() -> int:
+    """The configured limit, or as many requests as the pool has connections."""
+    if Config.ADMISSION_MAX_IN_FLIGHT is not None:
+        return Config.ADMISSION_MAX_IN_FLIGHT
+    if Config.DB_POOL_MODE == "null":
+        return Config.ADMISSION_NULL_POOL_MAX_IN_FLIGHT
+    return Config.DB_POOL_SIZE + Config.DB_MAX_OVERFLOW
+
+
+admission_controller = AdmissionController(
+    max_in_flight=max_in_flight(),
+    target=Config.ADMISSION_TARGET_WAIT_MS / 1000,
+    interval=Config.ADMISSION_INTERVAL_MS / 1000,
+    max_wait=Config.ADMISSION_MAX_WAIT_MS / 1000,
+)
@@ -7,12 +7,13 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.db.main import get_session
 from src.db.models import User
-from src.db.redis import token_in_blocklist
+from src.db.redis import token_revoked
 
 from .service import UserService
 from .utils import decode_token
 from src.errors import (
     InvalidToken,
+    RevokedToken,
     RefreshTokenRequired,
     AccessTokenRequired,
     InsufficientPermission,
@@ -33,11 +34,13 @@ class TokenBearer(HTTPBearer):
 
         token_data = decode_token(token)
 
-        if not self.token_valid(token):
+        if token_data is None:
             raise InvalidToken()
 
-        if await token_in_blocklist(token_data["jti"]):
-            raise InvalidToken()
+        if await token_revoked(
+            token_data["jti"], token_data["user"]["user_uid"], token_data.get("gen", 0)
+        ):
+            raise RevokedToken()
 
         self.verify_token_data(token_data)
 
@@ -1,22 +1,30 @@
 from datetime import timedelta, datetime
+from typing import Optional
 
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, Query, status, HTTPException
 from fastapi.responses import JSONResponse
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.db.main import get_session
-from src.db.redis import add_jti_to_blocklist
-from src.celery_tasks import send_email
+from src.db.models import User
+from src.db.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from src.db.redis import add_jti_to_blocklist, bump_token_generation, get_token_generation
+from src.celery_tasks import send_bulk_email, send_email
 from src.config import Config
+from src.ratelimit import RateLimiter
 
 from .dependencies import AccessTokenBearer, RefreshTokenBearer, RoleChecker, get_current_user
-from .schemas import UserCreateModel, UserLoginModel, EmailModel, PasswordResetRequestModel, PasswordResetConfirmModel, UserBooksModel
+from .schemas import UserCreateModel, UserLoginModel, EmailModel, PasswordResetRequestModel, PasswordResetConfirmModel, UserBooksModel, UserModel
 from .service import UserService
+from src.books.service import BookService
+from src.reviews.service import ReviewService
 from .utils import create_access_token, verify_password, generate_passwd_hash, create_url_safe_token, decode_url_safe_token
 from src.errors import UserAlreadyExists, UserNotFound, InvalidToken, InvalidCredentials
 
 auth_router = APIRouter()
 user_service = UserService()
+book_service = BookService()
+review_service = ReviewService()
 role_checker = RoleChecker(["admin", "user"])
 REFRESH_TOKEN_EXPIRY = 2
 
@@ -30,10 +38,8 @@ async def send_mail(emails: EmailModel):
     Test endpoint to send an email using Celery
     """
     recipients = emails.addresses
-    html = "<h1>Welcome to the app</h1>"
-    subject = "Welcome to our app"
 
-    send_email.delay(recipients, subject, html)
+    send_bulk_email.delay("welcome", recipients, {})
 
     return {"message": "Email sent successfully"}
 
@@ -55,13 +61,7 @@ async def create_user_account(user_data: UserCreateModel, session: AsyncSession
     link = f"{Config.DOMAIN}/api/v1/auth/verify/{token}"
 
     # Send verification email asynchronously via Celery
-    subject = "Verify Your Email"
-    html = f"""
-    <h1>Verify your Email</h1>
-    <p>Click this link to verify your account:</p>
-    <a href="{link}">{link}</a>
-    """
-    send_email.delay([email], subject, html)
+    send_email.delay("verify_email", [email], {"link": link})
 
     return {
         "message": "Account created! Verification email sent.",
@@ -94,13 +94,7 @@ async def verify_user_account(token: str, session: AsyncSession = Depends(get_se
         await user_service.update_user(user, {"is_verified": True}, session)
 
         # Send confirmation email asynchronously via Celery
-        subject = "Your Account is Verified!"
-        html = f"""
-        <h1>Account Verified</h1>
-        <p>Hi {user.first_name},</p>
-        <p>Your account has been successfully verified. You can now log in!</p>
-        """
-        send_email.delay([user_email], subject, html)
+        send_email.delay("account_verified", [user_email], {"first_name": user.first_name})
 
         return JSONResponse(
             content={"message": "Account verified successfully"},
@@ -116,7 +110,7 @@ async def verify_user_account(token: str, session: AsyncSession = Depends(get_se
 # =========================
 # Login Endpoint
 # =========================
-@auth_router.post("/login")
+@auth_router.post("/login", dependencies=[Depends(RateLimiter("auth:login", per="ip"))])
 async def login_users(login_data: UserLoginModel, session: AsyncSession = Depends(get_session)):
     email = login_data.email
     password = login_data.password
@@ -134,16 +128,18 @@ async def login_users(login_data: UserLoginModel, session: AsyncSession = Depend
             status_code=status.HTTP_403_FORBIDDEN,
         )
 
+    generation = await get_token_generation(str(user.uid))
+
     access_token = create_access_token({
         "email": user.email,
         "user_uid": str(user.uid),
         "role": user.role,
-    })
+    }, generation=generation)
 
     refresh_token = create_access_token({
         "email": user.email,
         "user_uid": str(user.uid)
-    }, refresh=True, expiry=timedelta(days=REFRESH_TOKEN_EXPIRY))
+    }, refresh=True, expiry=timedelta(days=REFRESH_TOKEN_EXPIRY), generation=generation)
 
     return {
         "message": "Login successful",
@@ -153,6 +149,65 @@ async def login_users(login_data: UserLoginModel, session: AsyncSession = Depend
     }
 
 
+# =========================
+# Logout Endpoints
+# =========================
+@auth_router.post("/logout")
+async def revoke_token(token_details: dict = Depends(AccessTokenBearer())):
+    """Revoke the access token used for this request."""
+    await add_jti_to_blocklist(token_details["jti"])
+
+    return JSONResponse(
+        content={"message": "Logged out successfully"},
+        status_code=status.HTTP_200_OK,
+    )
+
+
+@auth_router.post("/logout-all")
+async def revoke_all_tokens(token_details: dict = Depends(AccessTokenBearer())):
+    """Revoke every access and refresh token issued to the current user."""
+    await bump_token_generation(token_details["user"]["user_uid"])
+
+    return JSONResponse(
+        content={"message": "Logged out of all sessions"},
+        status_code=status.HTTP_200_OK,
+    )
+
+
+# =========================
+# Current User Profile
+# =========================
+@auth_router.get("/me", response_model=UserBooksModel, dependencies=[Depends(role_checker)])
+async def get_current_user_profile(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    books_cursor: Optional[str] = None,
+    reviews_cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Return the current user with one page of their books and reviews.
+
+    Each collection is paged independently; pass `books_cursor` or
+    `reviews_cursor` from a previous response to fetch the next page.
+    """
+    books, books_next_cursor = await book_service.get_user_books_page(
+        current_user.uid, session, books_cursor, limit
+    )
+    reviews, reviews_next_cursor = await review_service.get_user_reviews_page(
+        current_user.uid, session, reviews_cursor, limit
+    )
+
+    profile = {field: getattr(current_user, field) for field in UserModel.model_fields}
+    return {
+        **profile,
+        "books": books,
+        "reviews": reviews,
+        "books_next_cursor": books_next_cursor,
+        "reviews_next_cursor": reviews_next_cursor,
+    }
+
+
 # =========================
 # Password Reset Request
 # =========================
@@ -162,13 +217,7 @@ async def password_reset_request(email_data: PasswordResetRequestModel):
     token = create_url_safe_token({"email": email})
     link = f"{Config.DOMAIN}/api/v1/auth/password-reset-confirm/{token}"
 
-    subject = "Reset Your Password"
-    html_message = f"""
-    <h1>Reset Your Password</h1>
-    <p>Click this link to reset your password:</p>
-    <a href="{link}">{link}</a>
-    """
-    send_email.delay([email], subject, html_message)
+    send_email.delay("password_reset", [email], {"link": link})
 
     return {
         "message": "Password reset email sent! Check your inbox.",
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -43,6 +43,8 @@ class UserModel(BaseModel):
 class UserBooksModel(UserModel):
     books: List[Book]
     reviews: List[ReviewModel]
+    books_next_cursor: Optional[str] = None
+    reviews_next_cursor: Optional[str] = None
 
 
 class UserLoginModel(BaseModel):
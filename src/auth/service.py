@@ -1,3 +1,4 @@
+from sqlalchemy.orm import noload
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
@@ -8,7 +9,14 @@ from .utils import generate_passwd_hash
 
 class UserService:
     async def get_user_by_email(self, email: str, session: AsyncSession):
-        statement = select(User).where(User.email == email)
+        # Skip the selectin `books` and `reviews` collections: every
+        # authenticated request loads the user, and callers that need the
+        # user's books or reviews page through them explicitly.
+        statement = (
+            select(User)
+            .where(User.email == email)
+            .options(noload(User.books), noload(User.reviews))
+        )
         result = await session.exec(statement)
         user = result.first()
         return user
@@ -31,7 +31,7 @@ def verify_password(password: str, hash: str) -> bool:
 
 
 def create_access_token(
-    user_data: dict, expiry: timedelta = None, refresh: bool = False
+    user_data: dict, expiry: timedelta = None, refresh: bool = False, generation: int = 0
 ):
     payload = {
         "user": user_data,
@@ -39,6 +39,7 @@ def create_access_token(
         + (expiry if expiry is not None else timedelta(seconds=ACCESS_TOKEN_EXPIRY)),
         "jti": str(uuid.uuid4()),
         "refresh": refresh,
+        "gen": generation,
     }
 
     token = jwt.encode(
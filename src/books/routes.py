@@ -1,53 +1,119 @@
-from typing import List
-from fastapi import APIRouter, Depends, status
+import uuid
+from datetime import datetime
+from typing import Annotated, List, Optional
+from fastapi import APIRouter, Depends, Query, status
 from sqlmodel.ext.asyncio.session import AsyncSession
 from src.auth.dependencies import AccessTokenBearer, RoleChecker
 from src.books.service import BookService
 from src.db.main import get_session
-from .schemas import Book, BookCreateModel, BookDetailModel, BookUpdateModel
+from src.negotiation import MsgPackRoute
+from src.ratelimit import RateLimiter
+from src.singleflight import coalesced_read
+from .schemas import (
+    Book,
+    BookBatchGetModel,
+    BookBatchModel,
+    BookBulkDeleteModel,
+    BookBulkResultModel,
+    BookBulkUpdateModel,
+    BookCreateModel,
+    BookDetailModel,
+    BookListParams,
+    BookPageModel,
+    BookUpdateModel,
+    SimilarBookModel,
+)
 from src.errors import BookNotFound
 
-book_router = APIRouter()
+book_router = APIRouter(route_class=MsgPackRoute)
 book_service = BookService()
 access_token_bearer = AccessTokenBearer()
 role_checker = Depends(RoleChecker(["admin", "user"]))
 
-@book_router.get("/", response_model=List[Book], dependencies=[role_checker])
+@book_router.get(
+    "/",
+    response_model=BookPageModel,
+    dependencies=[Depends(RateLimiter("books:list")), role_checker],
+)
 async def get_all_books(
+    params: Annotated[BookListParams, Query()],
     session: AsyncSession = Depends(get_session),
     _: dict = Depends(access_token_bearer),
 ):
-    return await book_service.get_all_books(session)
+    books, next_cursor = await book_service.get_all_books(session, params)
+
+    # Facets describe the whole result set, so only the first page carries them.
+    facets = None
+    if params.cursor is None:
+        facets = await book_service.get_book_facets(session, params)
+
+    return {"items": books, "next_cursor": next_cursor, "facets": facets}
 
 @book_router.get("/user/{user_uid}", response_model=List[Book], dependencies=[role_checker])
 async def get_user_books(
     user_uid: str,
-    session: AsyncSession = Depends(get_session),
     _: dict = Depends(access_token_bearer),
 ):
-    return await book_service.get_user_books(user_uid, session)
+    return await coalesced_read(
+        ("get_user_books", user_uid), book_service.get_user_books, user_uid
+    )
 
 @book_router.get("/{book_uid}", response_model=BookDetailModel, dependencies=[role_checker])
-async def get_book(book_uid: str, session: AsyncSession = Depends(get_session), _: dict = Depends(access_token_bearer)):
-    book = await book_service.get_book(book_uid, session)
+async def get_book(book_uid: str, _: dict = Depends(access_token_bearer)):
+    book = await coalesced_read(("get_book", book_uid), book_service.get_book, book_uid)
     if not book:
         raise BookNotFound()
     return book
 
+@book_router.get("/{book_uid}/similar", response_model=List[SimilarBookModel], dependencies=[role_checker])
+async def get_similar_books(book_uid: uuid.UUID, _: dict = Depends(access_token_bearer)):
+    return await book_service.get_similar_books(book_uid)
+
+@book_router.post("/batch-get", response_model=BookBatchModel, dependencies=[role_checker])
+async def batch_get_books(batch: BookBatchGetModel, session: AsyncSession = Depends(get_session), _: dict = Depends(access_token_bearer)):
+    books, missing = await book_service.get_books_by_uids(batch.uids, session)
+    return {"books": books, "missing": missing}
+
 @book_router.post("/", status_code=status.HTTP_201_CREATED, response_model=Book, dependencies=[role_checker])
 async def create_book(book_data: BookCreateModel, session: AsyncSession = Depends(get_session), token_details: dict = Depends(access_token_bearer)):
     user_id = token_details["user"]["user_uid"]
     return await book_service.create_book(book_data, user_id, session)
 
+@book_router.patch("/bulk", response_model=BookBulkResultModel, dependencies=[role_checker])
+async def bulk_update_books(bulk: BookBulkUpdateModel, session: AsyncSession = Depends(get_session), token_details: dict = Depends(access_token_bearer)):
+    user = token_details["user"]
+    results = await book_service.bulk_update_books(
+        bulk.books, user["user_uid"], user.get("role") == "admin", session
+    )
+    return {"results": results}
+
+@book_router.delete("/bulk", response_model=BookBulkResultModel, dependencies=[role_checker])
+async def bulk_delete_books(bulk: BookBulkDeleteModel, session: AsyncSession = Depends(get_session), token_details: dict = Depends(access_token_bearer)):
+    user = token_details["user"]
+    results = await book_service.bulk_delete_books(
+        bulk.uids, user["user_uid"], user.get("role") == "admin", session
+    )
+    return {"results": results}
+
 @book_router.patch("/{book_uid}", response_model=Book, dependencies=[role_checker])
-async def update_book(book_uid: str, book_update_data: BookUpdateModel, session: AsyncSession = Depends(get_session), _: dict = Depends(access_token_bearer)):
-    updated_book = await book_service.update_book(book_uid, book_update_data, session)
+async def update_book(
+    book_uid: str,
+    book_update_data: BookUpdateModel,
+    expected_update_at: Optional[datetime] = Query(
+        None, description="Only update if the book's update_at still has this value"
+    ),
+    session: AsyncSession = Depends(get_session),
+    _: dict = Depends(access_token_bearer),
+):
+    updated_book = await book_service.update_book(
+        book_uid, book_update_data, session, expected_update_at=expected_update_at
+    )
     if not updated_book:
         raise BookNotFound()
     return updated_book
 
 @book_router.delete("/{book_uid}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[role_checker])
-async def delete_book(book_uid: str, session: AsyncSession = Depends(get_session), _: dict = Depends(access_token_bearer)):
+async def delete_book(book_uid: uuid.UUID, session: AsyncSession = Depends(get_session), _: dict = Depends(access_token_bearer)):
     deleted = await book_service.delete_book(book_uid, session)
     if deleted is None:
         raise BookNotFound()
@@ -1,10 +1,12 @@
 import uuid
 from datetime import date, datetime
-from typing import List
+from typing import Dict, List, Literal
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 
+from src.config import Config
+from src.db.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from src.reviews.schemas import ReviewModel
 from src.tags.schemas import TagModel
 
@@ -21,11 +23,64 @@ class Book(BaseModel):
     update_at: datetime
 
 
+class BookListParams(BaseModel):
+    tags: Optional[str] = Field(None, max_length=200, description="Comma-separated tag names")
+    mode: Literal["all", "any"] = "any"
+    language: Optional[str] = Field(None, max_length=50)
+    author: Optional[str] = Field(None, max_length=200)
+    publisher: Optional[str] = Field(None, max_length=200)
+    published_from: Optional[date] = None
+    published_to: Optional[date] = None
+    min_pages: Optional[int] = Field(None, ge=0)
+    max_pages: Optional[int] = Field(None, ge=0)
+    cursor: Optional[str] = None
+    limit: int = Field(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+
+    @model_validator(mode="after")
+    def check_ranges(self):
+        if self.published_from and self.published_to and self.published_from > self.published_to:
+            raise ValueError("published_from must not be after published_to")
+        if self.min_pages is not None and self.max_pages is not None and self.min_pages > self.max_pages:
+            raise ValueError("min_pages must not be greater than max_pages")
+        return self
+
+    @property
+    def tag_names(self) -> List[str]:
+        if not self.tags:
+            return []
+        return [name.strip() for name in self.tags.split(",") if name.strip()]
+
+
+class BookFacetsModel(BaseModel):
+    language: Dict[str, int]
+    publisher: Dict[str, int]
+
+
+class BookPageModel(BaseModel):
+    items: List[Book]
+    next_cursor: Optional[str] = None
+    facets: Optional[BookFacetsModel] = None
+
+
 class BookDetailModel(Book):
     reviews: List[ReviewModel]
     tags:List[TagModel]
 
 
+class SimilarBookModel(BaseModel):
+    uid: uuid.UUID
+    score: float
+
+
+class BookBatchGetModel(BaseModel):
+    uids: List[uuid.UUID] = Field(min_length=1, max_length=Config.BOOK_BATCH_MAX_SIZE)
+
+
+class BookBatchModel(BaseModel):
+    books: List[BookDetailModel]
+    missing: List[uuid.UUID]
+
+
 class BookCreateModel(BaseModel):
     title: str
     author: str
@@ -41,4 +96,24 @@ class BookUpdateModel(BaseModel):
     publisher: Optional[str] = None
     published_date: Optional[date] = None
     page_count: Optional[int] = None
-    language: Optional[str] = None
\ No newline at end of file
+    language: Optional[str] = None
+
+class BookBulkUpdateItem(BookUpdateModel):
+    uid: uuid.UUID
+
+
+class BookBulkUpdateModel(BaseModel):
+    books: List[BookBulkUpdateItem] = Field(min_length=1, max_length=Config.BOOK_BULK_MAX_SIZE)
+
+
+class BookBulkDeleteModel(BaseModel):
+    uids: List[uuid.UUID] = Field(min_length=1, max_length=Config.BOOK_BULK_MAX_SIZE)
+
+
+class BookBulkOutcome(BaseModel):
+    uid: uuid.UUID
+    status: Literal["updated", "deleted", "not_found", "forbidden"]
+
+
+class BookBulkResultModel(BaseModel):
+    results: List[BookBulkOutcome]
@@ -1,24 +1,254 @@
+import hashlib
+import json
+import logging
+import struct
+import uuid
 from datetime import datetime
+from typing import Optional
+from redis.exceptions import RedisError
+import sqlalchemy.dialects.postgresql as pg
+from sqlalchemy import any_, column, delete, func, intersect, literal, true, union, update, values
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from src.db.models import Book
-from .schemas import BookCreateModel, BookUpdateModel
+from src.config import Config
+from src.db.models import Book, BookTag, Review, Tag
+from src.db.pagination import keyset_paginate, page_of
+from src.db.redis import get_redis
+from src.errors import BookUpdateConflict
+from .schemas import Book as BookSchema, BookCreateModel, BookListParams, BookUpdateModel
+
+# List endpoints only serialize the columns of the `Book` schema, so select
+# those as plain rows instead of hydrating ORM instances with their
+# selectin-loaded reviews and tags.
+BOOK_LIST_COLUMNS = tuple(getattr(Book, name) for name in BookSchema.model_fields)
+BOOK_FACET_SIZE = 20
+UPDATABLE_COLUMNS = tuple(BookUpdateModel.model_fields)
+
+# Similar books are precomputed by a Celery job (src/books/similar.py) and
+# stored per book as packed (uid, score) records, best match first.
+SIMILAR_BOOKS_KEY = "similar_books:{}"
+SIMILAR_BOOKS_DIRTY_KEY = "similar_books:dirty"
+SIMILAR_RECORD = struct.Struct("<16sf")
+
+
+def uid_array(uids: list):
+    """Bind a list of uids as one uuid[] parameter, for `= ANY(...)`."""
+    return literal(list(uids), pg.ARRAY(pg.UUID(as_uuid=True)))
+
+
+def owned_by(user_uid: str, is_admin: bool = False):
+    """Restrict a statement to the user's own books unless they are an admin."""
+    return true() if is_admin else Book.user_uid == user_uid
+
+
+def delete_books_statement(uids: list, owner_clause):
+    """
+    Delete books and everything pointing at them in a single statement.
+
+    Data-modifying CTEs unlink the books' tags (decrementing their
+    `book_count`) and detach their reviews, mirroring what the ORM does on
+    delete. Foreign keys are checked at the end of the statement, once all of
+    them have run. Selects the uids that were actually deleted.
+    """
+    deleted = (
+        delete(Book)
+        .where(Book.uid == any_(uid_array(uids)), owner_clause)
+        .returning(Book.uid)
+        .cte("deleted_books")
+    )
+    unlinked = (
+        delete(BookTag)
+        .where(BookTag.book_id.in_(select(deleted.c.uid)))
+        .returning(BookTag.tag_id)
+        .cte("unlinked_tags")
+    )
+    tag_counts = (
+        select(unlinked.c.tag_id, func.count().label("n"))
+        .group_by(unlinked.c.tag_id)
+        .subquery()
+    )
+    decremented = (
+        update(Tag)
+        .where(Tag.uid == tag_counts.c.tag_id)
+        .values(book_count=Tag.book_count - tag_counts.c.n)
+        .returning(Tag.uid)
+        .cte("decremented_tags")
+    )
+    detached = (
+        update(Review)
+        .where(Review.book_uid.in_(select(deleted.c.uid)))
+        .values(book_uid=None)
+        .returning(Review.uid)
+        .cte("detached_reviews")
+    )
+    return select(deleted.c.uid).add_cte(unlinked, decremented, detached)
+
+
+def pack_similar(uids, scores) -> bytes:
+    return b"".join(SIMILAR_RECORD.pack(uid.bytes, score) for uid, score in zip(uids, scores))
+
+
+def unpack_similar(blob: bytes) -> list[dict]:
+    return [
+        {"uid": uuid.UUID(bytes=raw), "score": score}
+        for raw, score in SIMILAR_RECORD.iter_unpack(blob)
+    ]
+
+
+async def mark_similar_dirty(*book_uids) -> None:
+    """Queue books whose reviews or tags changed (or that were deleted) for a refresh."""
+    try:
+        await get_redis().sadd(SIMILAR_BOOKS_DIRTY_KEY, *(str(uid) for uid in book_uids))
+    except RedisError:
+        # The periodic full rebuild picks them up anyway.
+        logging.warning("Could not mark books %s for similarity refresh", book_uids)
+
+
+def book_filters(params: BookListParams, exclude: Optional[str] = None) -> list:
+    """Build the WHERE clauses for a book listing, optionally skipping one facet."""
+    clauses = []
+    for name in ("language", "author", "publisher"):
+        value = getattr(params, name)
+        if value is not None and name != exclude:
+            clauses.append(getattr(Book, name) == value)
+
+    if params.published_from is not None:
+        clauses.append(Book.published_date >= params.published_from)
+    if params.published_to is not None:
+        clauses.append(Book.published_date <= params.published_to)
+    if params.min_pages is not None:
+        clauses.append(Book.page_count >= params.min_pages)
+    if params.max_pages is not None:
+        clauses.append(Book.page_count <= params.max_pages)
+
+    if params.tag_names:
+        per_tag = [
+            select(BookTag.book_id)
+            .join(Tag, Tag.uid == BookTag.tag_id)
+            .where(Tag.name == name)
+            for name in params.tag_names
+        ]
+        combine = intersect if params.mode == "all" else union
+        clauses.append(Book.uid.in_(combine(*per_tag)))
+
+    return clauses
+
 
 class BookService:
-    async def get_all_books(self, session: AsyncSession):
-        result = await session.exec(select(Book).order_by(Book.created_at.desc()))
-        return result.all()
+    async def get_all_books(self, session: AsyncSession, params: BookListParams):
+        """
+        Page through books newest first, filtered by `params`.
+
+        Tag filters keep books carrying any (`mode="any"`) or all
+        (`mode="all"`) of the given tag names.
+        """
+        statement = select(*BOOK_LIST_COLUMNS).where(*book_filters(params))
+        statement = keyset_paginate(
+            statement, Book.created_at, Book.uid, params.cursor, params.limit
+        )
+        result = await session.exec(statement)
+        return page_of(result.all(), params.limit)
+
+    async def get_book_facets(self, session: AsyncSession, params: BookListParams):
+        """
+        Count matching books per language and per publisher.
+
+        Each facet ignores its own filter, so clients can show the other
+        values a user could switch to. Counts are cached in Redis per filter
+        combination for `Config.BOOK_FACETS_CACHE_SECONDS`.
+        """
+        filters = params.model_dump(exclude={"cursor", "limit"}, mode="json")
+        key = "book_facets:" + hashlib.sha1(
+            json.dumps(filters, sort_keys=True).encode()
+        ).hexdigest()
+
+        try:
+            cached = await get_redis().get(key)
+        except RedisError as e:
+            logging.warning("Book facet cache unavailable: %s", e)
+            cached = None
+        if cached is not None:
+            return json.loads(cached)
+
+        facets = {}
+        for name in ("language", "publisher"):
+            column = getattr(Book, name)
+            statement = (
+                select(column, func.count())
+                .where(*book_filters(params, exclude=name))
+                .group_by(column)
+                .order_by(func.count().desc())
+                .limit(BOOK_FACET_SIZE)
+            )
+            result = await session.exec(statement)
+            facets[name] = {value: count for value, count in result.all()}
+
+        try:
+            await get_redis().set(key, json.dumps(facets), ex=Config.BOOK_FACETS_CACHE_SECONDS)
+        except RedisError as e:
+            logging.warning("Book facet cache unavailable: %s", e)
+        return facets
+
+    async def get_tag_books(
+        self, tag_uid: str, session: AsyncSession, cursor: str | None, limit: int
+    ):
+        statement = keyset_paginate(
+            select(*BOOK_LIST_COLUMNS)
+            .join(BookTag, BookTag.book_id == Book.uid)
+            .where(BookTag.tag_id == tag_uid),
+            Book.created_at, Book.uid, cursor, limit,
+        )
+        result = await session.exec(statement)
+        return page_of(result.all(), limit)
 
     async def get_user_books(self, user_uid: str, session: AsyncSession):
         result = await session.exec(
-            select(Book).where(Book.user_uid == user_uid).order_by(Book.created_at.desc())
+            select(*BOOK_LIST_COLUMNS)
+            .where(Book.user_uid == user_uid)
+            .order_by(Book.created_at.desc())
         )
         return result.all()
 
+    async def get_user_books_page(
+        self, user_uid: str, session: AsyncSession, cursor: str | None, limit: int
+    ):
+        statement = keyset_paginate(
+            select(*BOOK_LIST_COLUMNS).where(Book.user_uid == user_uid),
+            Book.created_at, Book.uid, cursor, limit,
+        )
+        result = await session.exec(statement)
+        return page_of(result.all(), limit)
+
+    async def get_similar_books(self, book_uid: uuid.UUID):
+        # Recommendations are optional: without Redis there are simply none.
+        try:
+            blob = await get_redis().get(SIMILAR_BOOKS_KEY.format(book_uid))
+        except RedisError as e:
+            logging.warning("Similar books unavailable: %s", e)
+            return []
+        return unpack_similar(blob) if blob else []
+
     async def get_book(self, book_uid: str, session: AsyncSession):
         result = await session.exec(select(Book).where(Book.uid == book_uid))
         return result.first()
 
+    async def get_books_by_uids(self, book_uids: list, session: AsyncSession):
+        """
+        Load many books in one `uid = ANY(:uids)` query.
+
+        Their reviews and tags come from one selectin query per relationship
+        for the whole batch. Returns the books found and the uids that were
+        not, both in request order.
+        """
+        uids = list(dict.fromkeys(book_uids))
+        statement = select(Book).where(Book.uid == any_(uid_array(uids)))
+        result = await session.exec(statement)
+        found = {book.uid: book for book in result.all()}
+
+        books = [found[uid] for uid in uids if uid in found]
+        missing = [uid for uid in uids if uid not in found]
+        return books, missing
+
     async def create_book(self, book_data: BookCreateModel, user_uid: str, session: AsyncSession):
         book_dict = book_data.model_dump()
         new_book = Book(**book_dict)
@@ -29,21 +259,120 @@ class BookService:
         await session.refresh(new_book)
         return new_book
 
-    async def update_book(self, book_uid: str, update_data: BookUpdateModel, session: AsyncSession):
-        book_to_update = await self.get_book(book_uid, session)
-        if not book_to_update:
-            return None
-        update_dict = update_data.model_dump(exclude_unset=True)
-        for k, v in update_dict.items():
-            setattr(book_to_update, k, v)
+    async def update_book(
+        self,
+        book_uid: str,
+        update_data: BookUpdateModel,
+        session: AsyncSession,
+        expected_update_at: Optional[datetime] = None,
+    ):
+        """
+        Update a book with a single `UPDATE ... RETURNING`.
+
+        With `expected_update_at` the update only applies if the book has not
+        changed since the client read it, otherwise `BookUpdateConflict` is
+        raised.
+        """
+        statement = update(Book).where(Book.uid == book_uid)
+        if expected_update_at is not None:
+            statement = statement.where(Book.update_at == expected_update_at)
+        statement = statement.values(
+            **update_data.model_dump(exclude_unset=True), update_at=datetime.now()
+        ).returning(*BOOK_LIST_COLUMNS)
+
+        result = await session.exec(statement)
+        updated_book = result.first()
         await session.commit()
-        await session.refresh(book_to_update)
-        return book_to_update
 
-    async def delete_book(self, book_uid: str, session: AsyncSession):
-        book_to_delete = await self.get_book(book_uid, session)
-        if not book_to_delete:
-            return None
-        await session.delete(book_to_delete)
+        # Only a failed conditional update needs a second query, to tell a
+        # missing book from a stale one.
+        if updated_book is None and expected_update_at is not None:
+            result = await session.exec(select(Book.uid).where(Book.uid == book_uid))
+            if result.first() is not None:
+                raise BookUpdateConflict()
+        return updated_book
+
+    async def delete_book(self, book_uid: uuid.UUID, session: AsyncSession):
+        result = await session.exec(delete_books_statement([book_uid], true()))
+        deleted = result.first()
         await session.commit()
+        if deleted is None:
+            return None
+        await mark_similar_dirty(deleted)
         return {}
+
+    async def bulk_update_books(
+        self, items: list, user_uid: str, is_admin: bool, session: AsyncSession
+    ):
+        """
+        Apply many partial updates with one `UPDATE ... FROM (VALUES ...)`.
+
+        Fields an item leaves unset keep their current value. Ownership is part
+        of the UPDATE's WHERE clause, so books the user may not edit are never
+        touched. Returns one outcome per uid.
+        """
+        changes = {item.uid: item for item in items}
+        rows = values(
+            column("uid", pg.UUID(as_uuid=True)),
+            *(column(name, Book.__table__.c[name].type) for name in UPDATABLE_COLUMNS),
+            name="changes",
+        ).data([
+            (uid, *(getattr(item, name) for name in UPDATABLE_COLUMNS))
+            for uid, item in changes.items()
+        ])
+
+        assignments = {
+            name: func.coalesce(rows.c[name], getattr(Book, name))
+            for name in UPDATABLE_COLUMNS
+        }
+        assignments["update_at"] = datetime.now()
+        statement = (
+            update(Book)
+            .where(Book.uid == rows.c.uid, owned_by(user_uid, is_admin))
+            .values(assignments)
+            .returning(Book.uid)
+        )
+        result = await session.exec(statement)
+        updated = {row.uid for row in result.all()}
+
+        outcomes = await self._bulk_outcomes(list(changes), updated, "updated", session)
+        await session.commit()
+        return outcomes
+
+    async def bulk_delete_books(
+        self, book_uids: list, user_uid: str, is_admin: bool, session: AsyncSession
+    ):
+        """Delete many books in one statement and return one outcome per uid."""
+        uids = list(dict.fromkeys(book_uids))
+        result = await session.exec(
+            delete_books_statement(uids, owned_by(user_uid, is_admin))
+        )
+        deleted = set(result.all())
+
+        outcomes = await self._bulk_outcomes(uids, deleted, "deleted", session)
+        await session.commit()
+        if deleted:
+            await mark_similar_dirty(*deleted)
+        return outcomes
+
+    async def _bulk_outcomes(
+        self, uids: list, done: set, done_status: str, session: AsyncSession
+    ):
+        """Tell apart uids that do not exist from books the user does not own."""
+        missed = [uid for uid in uids if uid not in done]
+        existing = set()
+        if missed:
+            result = await session.exec(
+                select(Book.uid).where(Book.uid == any_(uid_array(missed)))
+            )
+            existing = set(result.all())
+
+        return [
+            {
+                "uid": uid,
+                "status": done_status if uid in done
+                else "forbidden" if uid in existing
+                else "not_found",
+            }
+            for uid in uids
+        ]
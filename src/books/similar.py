@@ -0,0 +1,202 @@
+"""
+Offline "readers who reviewed this also reviewed" computation.
+
+Runs in the Celery worker only; the API reads the stored results with a
+single Redis GET (`BookService.get_similar_books`). Each book is a row of a
+sparse matrix whose columns are its reviewers and, at a lower weight, its
+tags. Rows are L2-normalised, so one sparse product `X[rows] @ X.T` gives
+the cosine similarity of those books to every other book.
+"""
+
+import logging
+import uuid
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+from asgiref.sync import async_to_sync
+from scipy import sparse
+from sqlalchemy import any_, select, union
+
+from src.books.service import (
+    SIMILAR_BOOKS_DIRTY_KEY,
+    SIMILAR_BOOKS_KEY,
+    pack_similar,
+    uid_array,
+    unpack_similar,
+)
+from src.config import Config
+from src.db.main import create_task_engine
+from src.db.redis import get_sync_redis
+from src.db.models import BookTag, Review
+
+# A shared tag counts for less than a shared reader.
+TAG_WEIGHT = 0.5
+# Rows multiplied (and results written to Redis) per round, to bound memory.
+CHUNK_SIZE = 1024
+
+logger = logging.getLogger(__name__)
+
+
+async def load_interactions(book_uids: Optional[list] = None):
+    """
+    Fetch (book, user) review pairs and (book, tag) pairs.
+
+    With `book_uids`, only the neighbourhood of those books is loaded: every
+    book sharing a reader or a tag with them, with all of its own reviews and
+    tags so that its norm (and so its similarity) is exact.
+    """
+    reviews = select(Review.book_uid, Review.user_uid).where(
+        Review.book_uid.is_not(None), Review.user_uid.is_not(None)
+    ).distinct()
+    tags = select(BookTag.book_id, BookTag.tag_id)
+
+    if book_uids is not None:
+        seeds = uid_array(book_uids)
+        readers = select(Review.user_uid).where(Review.book_uid == any_(seeds))
+        seed_tags = select(BookTag.tag_id).where(BookTag.book_id == any_(seeds))
+        neighbourhood = union(
+            select(Review.book_uid).where(Review.user_uid.in_(readers)),
+            select(BookTag.book_id).where(BookTag.tag_id.in_(seed_tags)),
+        ).subquery()
+        reviews = reviews.where(Review.book_uid.in_(select(neighbourhood.c[0])))
+        tags = tags.where(BookTag.book_id.in_(select(neighbourhood.c[0])))
+
+    engine = create_task_engine()
+    try:
+        async with engine.connect() as conn:
+            review_pairs = (await conn.execute(reviews)).all()
+            tag_pairs = (await conn.execute(tags)).all()
+    finally:
+        await engine.dispose()
+    return review_pairs, tag_pairs
+
+
+def build_matrix(review_pairs, tag_pairs):
+    """Build the row-normalised book x (readers + tags) matrix and its book uids."""
+    book_index: dict = {}
+    user_index: dict = {}
+    tag_index: dict = {}
+
+    review_rows = [book_index.setdefault(book, len(book_index)) for book, _ in review_pairs]
+    review_cols = [user_index.setdefault(user, len(user_index)) for _, user in review_pairs]
+    tag_rows = [book_index.setdefault(book, len(book_index)) for book, _ in tag_pairs]
+    tag_cols = [len(user_index) + tag_index.setdefault(tag, len(tag_index)) for _, tag in tag_pairs]
+
+    data = np.concatenate([
+        np.ones(len(review_rows), dtype=np.float32),
+        np.full(len(tag_rows), TAG_WEIGHT, dtype=np.float32),
+    ])
+    matrix = sparse.csr_matrix(
+        (data, (review_rows + tag_rows, review_cols + tag_cols)),
+        shape=(len(book_index), len(user_index) + len(tag_index)),
+        dtype=np.float32,
+    )
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    matrix = sparse.diags(1.0 / norms).dot(matrix).tocsr()
+
+    books = np.empty(len(book_index), dtype=object)
+    for book, i in book_index.items():
+        books[i] = book
+    return books, matrix
+
+
+def top_k_similar(matrix, rows: Iterable[int], k: int) -> Iterator[tuple]:
+    """Yield (row, neighbour rows, scores) for each row, best match first."""
+    rows = np.fromiter(rows, dtype=np.int64)
+    transposed = matrix.T.tocsc()
+
+    for start in range(0, len(rows), CHUNK_SIZE):
+        block = rows[start:start + CHUNK_SIZE]
+        scores = matrix[block].dot(transposed).tocsr()
+
+        for offset, row in enumerate(block):
+            lo, hi = scores.indptr[offset], scores.indptr[offset + 1]
+            cols, vals = scores.indices[lo:hi], scores.data[lo:hi]
+
+            keep = cols != row
+            cols, vals = cols[keep], vals[keep]
+            if len(vals) > k:
+                best = np.argpartition(vals, -k)[-k:]
+                cols, vals = cols[best], vals[best]
+
+            order = np.argsort(-vals, kind="stable")
+            yield row, cols[order], vals[order]
+
+
+def store_similar(client, books, results: Iterable[tuple]) -> int:
+    """Write each book's list under its own key; returns how many were written."""
+    expiry = 2 * Config.SIMILAR_BOOKS_REBUILD_SECONDS
+    written = 0
+
+    pipe = client.pipeline(transaction=False)
+    for row, cols, vals in results:
+        key = SIMILAR_BOOKS_KEY.format(books[row])
+        if len(cols):
+            pipe.set(key, pack_similar(books[cols], vals.tolist()), ex=expiry)
+        else:
+            pipe.delete(key)
+        written += 1
+
+        if written % CHUNK_SIZE == 0:
+            pipe.execute()
+    pipe.execute()
+    return written
+
+
+def rebuild_similar_books() -> int:
+    """Recompute the similar-book list of every book."""
+    review_pairs, tag_pairs = async_to_sync(load_interactions)()
+    books, matrix = build_matrix(review_pairs, tag_pairs)
+
+    written = store_similar(
+        get_sync_redis(), books, top_k_similar(matrix, range(len(books)), Config.SIMILAR_BOOKS_K)
+    )
+
+    logger.info("Rebuilt similar books for %d books", written)
+    return written
+
+
+def refresh_similar_books() -> int:
+    """
+    Recompute the lists of books whose reviews or tags changed recently.
+
+    Only the changed books' own lists are rewritten. A changed book may also
+    move into or out of its neighbours' lists; those catch up on the next
+    full rebuild. Deleted books are the exception: their neighbours are
+    queued for the next refresh, so that no list keeps pointing at them.
+
+    Books leave the dirty set only once their lists are written; if the
+    refresh fails they stay queued for the next one.
+    """
+    client = get_sync_redis()
+    dirty = client.srandmember(SIMILAR_BOOKS_DIRTY_KEY, Config.SIMILAR_BOOKS_REFRESH_BATCH)
+    if not dirty:
+        return 0
+
+    book_uids = [uuid.UUID(uid.decode()) for uid in dirty]
+    review_pairs, tag_pairs = async_to_sync(load_interactions)(book_uids)
+    books, matrix = build_matrix(review_pairs, tag_pairs)
+
+    row_of = {book: i for i, book in enumerate(books)}
+    rows = [row_of[uid] for uid in book_uids if uid in row_of]
+    written = store_similar(client, books, top_k_similar(matrix, rows, Config.SIMILAR_BOOKS_K))
+
+    # Books left without reviews or tags (deleted ones included) have no
+    # neighbours any more; the books that listed them need a new list.
+    gone = [uid for uid in book_uids if uid not in row_of]
+    if gone:
+        keys = [SIMILAR_BOOKS_KEY.format(uid) for uid in gone]
+        neighbours = {
+            str(entry["uid"])
+            for blob in client.mget(keys) if blob
+            for entry in unpack_similar(blob)
+        }.difference(str(uid) for uid in gone)
+        if neighbours:
+            client.sadd(SIMILAR_BOOKS_DIRTY_KEY, *neighbours)
+        client.delete(*keys)
+
+    client.srem(SIMILAR_BOOKS_DIRTY_KEY, *dirty)
+    logger.info("Refreshed similar books for %d of %d changed books", written, len(dirty))
+    return written
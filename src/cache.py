@@ -0,0 +1,165 @@
+"""
+Two-tier read-through cache for service methods.
+
+L1 is a small per-worker LRU with a short TTL; L2 is Redis, shared by all
+workers. Each namespace has a generation counter in Redis: invalidating
+bumps it, which orphans every L2 entry of the namespace at once (they age
+out by TTL) and clears this worker's L1. A worker reads its own writes:
+loads that were in flight when it invalidated are not kept in its L1.
+Other workers' L1 entries live at most `l1_ttl` seconds past an
+invalidation.
+
+Misses are collapsed through `SingleFlight`, so a cold key costs one Redis
+lookup and at most one database query per worker however many requests ask
+for it at once.
+"""
+
+import functools
+import inspect
+import logging
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from pydantic import TypeAdapter
+from redis.exceptions import RedisError
+
+from src.db.main import new_session
+from src.db.redis import get_redis
+from src.singleflight import SingleFlight
+
+cache_flights = SingleFlight()
+
+
+class TwoTierCache:
+    def __init__(
+        self,
+        namespace: str,
+        ttl: float,
+        l1_ttl: float,
+        version: int = 1,
+        jitter: float = 0.1,
+        l1_max_entries: int = 1024,
+    ) -> None:
+        # Bump `version` when the cached schema changes, so new code never
+        # reads entries written by old code.
+        self.prefix = f"cache:{namespace}:v{version}"
+        self.generation_key = f"cache:{namespace}:generation"
+        self.ttl = ttl
+        self.l1_ttl = l1_ttl
+        self.jitter = jitter
+        self.l1_max_entries = l1_max_entries
+        self.l1: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        # Invalidations seen by this worker, to tell loads that raced one.
+        self.invalidations = 0
+
+    def jittered(self, ttl: float) -> float:
+        # Spread expiries so keys cached together are not all reloaded together.
+        return ttl * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    # =========================
+    # L1
+    # =========================
+    def l1_get(self, key: str) -> tuple[bool, Any]:
+        entry = self.l1.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self.l1[key]
+            return False, None
+        self.l1.move_to_end(key)
+        return True, value
+
+    def l1_set(self, key: str, value: Any) -> None:
+        self.l1[key] = (time.monotonic() + self.jittered(self.l1_ttl), value)
+        self.l1.move_to_end(key)
+        while len(self.l1) > self.l1_max_entries:
+            self.l1.popitem(last=False)
+
+    # =========================
+    # L2 + load
+    # =========================
+    async def load(self, key: str, adapter: TypeAdapter, loader) -> Any:
+        redis = get_redis()
+        generation = None
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                current, stored = await pipe.get(self.generation_key).get(key).execute()
+            generation = current or b"0"
+            if stored is not None:
+                stored_generation, _, payload = stored.partition(b"|")
+                if stored_generation == generation:
+                    return adapter.validate_json(payload)
+        except RedisError as e:
+            logging.warning("Cache L2 unavailable for %s: %s", key, e)
+
+        async with new_session() as session:
+            result = await loader(session)
+        value = adapter.validate_python(result, from_attributes=True)
+
+        if generation is not None:
+            # Written under the generation read *before* loading: if an
+            # invalidation raced with the query, this entry is already stale.
+            try:
+                await redis.set(
+                    key, generation + b"|" + adapter.dump_json(value), ex=int(self.jittered(self.ttl))
+                )
+            except RedisError as e:
+                logging.warning("Could not write cache entry %s: %s", key, e)
+        return value
+
+    def cached(self, adapter: TypeAdapter):
+        """
+        Cache an async service method `(self, ..., session)`.
+
+        Results are validated into `adapter`'s type, which must be what the
+        routes serialize anyway. The decorator supplies `session`: on a miss
+        the method runs with a session of its own, since the load may be
+        shared by several requests, so callers may omit it. A `session` the
+        caller passes is ignored and is not part of the cache key.
+        """
+
+        def decorator(fn):
+            signature = inspect.signature(fn)
+
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs) -> Any:
+                bound = signature.bind_partial(*args, **kwargs)
+                service = bound.arguments.pop("self")
+                bound.arguments.pop("session", None)
+                key = ":".join(
+                    [self.prefix, fn.__name__, *(str(v) for v in bound.arguments.values())]
+                )
+
+                hit, value = self.l1_get(key)
+                if hit:
+                    return value
+
+                async def loader(session):
+                    return await fn(service, *bound.args, session=session, **bound.kwargs)
+
+                # A load that started before an invalidation may return the
+                # old value: it is neither joined by later requests nor kept.
+                invalidations = self.invalidations
+                flight_key: Hashable = ("cache", key, invalidations)
+                value = await cache_flights.do(flight_key, lambda: self.load(key, adapter, loader))
+                if self.invalidations == invalidations:
+                    self.l1_set(key, value)
+                return value
+
+            return wrapper
+
+        return decorator
+
+    async def invalidate(self) -> None:
+        """Drop every cached entry of this namespace, on all workers."""
+        try:
+            await get_redis().incr(self.generation_key)
+        except RedisError as e:
+            # L2 entries then live out their TTL.
+            logging.warning("Could not invalidate cache %s: %s", self.generation_key, e)
+        # Only once the generation moved on: loads started from here read it.
+        self.invalidations += 1
+        self.l1.clear()
@@ -1,35 +1,256 @@
-from celery import Celery
-from src.mail import mail, create_message
+from typing import Callable, Optional
+
+from celery import Celery, Task
+from celery.local import Proxy
+from celery.signals import worker_process_init
+from celery.utils.time import get_exponential_backoff_interval
 from asgiref.sync import async_to_sync
+from kombu import Queue
 from src.config import Config
 
+TRANSACTIONAL_MAIL_QUEUE = "mail.transactional"
+BULK_MAIL_QUEUE = "mail.bulk"
+# Nothing consumes this queue by default. Once the cause is fixed, replay it
+# with: celery -A src.celery_tasks.c_app worker -Q mail.dead_letter
+DEAD_LETTER_QUEUE = "mail.dead_letter"
+# Background jobs get their own workers, so a catalogue-wide similarity
+# rebuild never sits in front of verification or password-reset mail.
+FEED_QUEUE = "reviews.feed"
+SIMILAR_BOOKS_QUEUE = "books.similar"
+
+# Task name -> (function, options), registered on the app when it is built.
+TASKS: dict[str, tuple[Callable, dict]] = {}
+
+# Created per process on first use, like the DB engine and the Redis client:
+# the app's broker connection and producer pools must not be created before
+# a fork and then shared by the forked workers.
+celery_app: Optional[Celery] = None
+
+
 # =========================
 # Celery app configuration
 # =========================
-c_app = Celery(
-    "worker",
-    broker=Config.REDIS_URL,
-    backend=Config.REDIS_URL,
-)
+def create_celery_app() -> Celery:
+    # No result backend: nothing reads task results, so storing them in Redis
+    # only cost memory.
+    app = Celery("worker", broker=Config.REDIS_URL)
+
+    app.conf.update(
+        broker_connection_retry_on_startup=True,
+        broker_connection_timeout=Config.BROKER_SOCKET_TIMEOUT_SECONDS,
+        broker_transport_options={
+            "socket_timeout": Config.BROKER_SOCKET_TIMEOUT_SECONDS,
+            "socket_connect_timeout": Config.BROKER_SOCKET_TIMEOUT_SECONDS,
+        },
+        task_ignore_result=True,
+        task_queues=(
+            Queue("celery"),
+            Queue(TRANSACTIONAL_MAIL_QUEUE),
+            Queue(BULK_MAIL_QUEUE),
+            Queue(DEAD_LETTER_QUEUE),
+            Queue(FEED_QUEUE),
+            Queue(SIMILAR_BOOKS_QUEUE),
+        ),
+        task_default_queue="celery",
+        task_routes={
+            "src.celery_tasks.send_email": {"queue": TRANSACTIONAL_MAIL_QUEUE},
+            "src.celery_tasks.send_bulk_email": {"queue": BULK_MAIL_QUEUE},
+            "src.celery_tasks.fan_out_review": {"queue": FEED_QUEUE},
+            "src.celery_tasks.retract_review": {"queue": FEED_QUEUE},
+            "src.celery_tasks.rebuild_similar_books": {"queue": SIMILAR_BOOKS_QUEUE},
+            "src.celery_tasks.refresh_similar_books": {"queue": SIMILAR_BOOKS_QUEUE},
+        },
+        # Take one message at a time, so a long task never holds back queued
+        # messages that another worker process could run.
+        worker_prefetch_multiplier=1,
+    )
+
+    # =========================
+    # Periodic tasks (run the worker with --beat)
+    # =========================
+    app.conf.beat_schedule = {
+        "rebuild-similar-books": {
+            "task": "src.celery_tasks.rebuild_similar_books",
+            "schedule": Config.SIMILAR_BOOKS_REBUILD_SECONDS,
+        },
+        "refresh-similar-books": {
+            "task": "src.celery_tasks.refresh_similar_books",
+            "schedule": Config.SIMILAR_BOOKS_REFRESH_SECONDS,
+        },
+    }
+
+    for name, (fn, options) in TASKS.items():
+        app.task(name=name, **options)(fn)
+    return app
+
+
+def get_celery() -> Celery:
+    global celery_app
+
+    if celery_app is None:
+        celery_app = create_celery_app()
+    return celery_app
+
+
+def __getattr__(name):
+    # `celery -A src.celery_tasks.c_app` resolves the app through here.
+    if name == "c_app":
+        return get_celery()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def task(**options):
+    """
+    Declare a Celery task of this module.
+
+    Returns a proxy to the task on this process's app, so the first
+    `.delay()` builds the app rather than the import.
+    """
+
+    def decorator(fn):
+        name = f"{__name__}.{fn.__name__}"
+        TASKS[name] = (fn, options)
+        return Proxy(lambda: get_celery().tasks[name], name=fn.__name__, __doc__=fn.__doc__)
+
+    return decorator
 
-c_app.conf.broker_connection_retry_on_startup = True
 
 # =========================
-# Celery task to send email
+# Celery tasks to send email
 # =========================
-@c_app.task
-def send_email(recipients: list[str], subject: str, body: str):
+class MailTask(Task):
+    """Retries delivery failures with exponential backoff, then dead-letters the mail."""
+
+    max_retries = Config.MAIL_MAX_RETRIES
+    # Acknowledge mail only once it is sent, so a crashed worker hands it to
+    # another one. Only mail: other tasks may outlive the broker's visibility
+    # timeout and would then be delivered twice.
+    acks_late = True
+    reject_on_worker_lost = True
+
+    def retry_delivery(self, exc: Exception, **options):
+        countdown = get_exponential_backoff_interval(
+            factor=Config.MAIL_RETRY_BACKOFF_SECONDS,
+            retries=self.request.retries,
+            maximum=Config.MAIL_RETRY_BACKOFF_MAX_SECONDS,
+            full_jitter=True,
+        )
+        return self.retry(exc=exc, countdown=countdown, **options)
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        # Don't re-queue mail that was already being replayed from the dead-letter queue.
+        if (self.request.delivery_info or {}).get("routing_key") != DEAD_LETTER_QUEUE:
+            self.apply_async(args, kwargs, queue=DEAD_LETTER_QUEUE)
+            print(f"❌ Email dead-lettered after {self.request.retries} retries: {exc}")
+
+
+@worker_process_init.connect
+def precompile_mail_templates(**kwargs):
+    from src.mail import precompile_templates
+
+    precompile_templates()
+
+
+def deliver(
+    task: MailTask,
+    template_id: str,
+    recipients: list[str],
+    context: dict,
+    personal: Optional[dict[str, dict]] = None,
+):
+    # Imported here so the API process, which only enqueues, never loads fastapi-mail
+    from fastapi_mail.errors import ConnectionErrors
+    from src.mail import get_mail, render_messages
+
+    messages = render_messages(template_id, recipients, context, personal)
+    sent = []
+
+    async def send_all():
+        for message in messages:
+            await get_mail().send_message(message)
+            sent.extend(message.recipients)
+
+    try:
+        # Use async_to_sync to call async FastMail in a sync Celery task
+        async_to_sync(send_all)()
+    except (ConnectionErrors, OSError) as exc:
+        # Only retry the recipients that have not been mailed yet.
+        remaining = [recipient for recipient in recipients if recipient not in sent]
+        raise task.retry_delivery(exc, args=(template_id, remaining, context, personal))
+
+    print(f"✅ Email '{template_id}' sent to {recipients}")
+
+
+@task(bind=True, base=MailTask)
+def send_email(
+    self,
+    template_id: str,
+    recipients: list[str],
+    context: dict,
+    personal: Optional[dict[str, dict]] = None,
+):
     """
-    Sends an email asynchronously using Celery and FastAPI-Mail.
+    Sends a transactional email (verification, password reset, ...) asynchronously.
 
     Args:
+        template_id (str): Key of `src.mail.MAIL_TEMPLATES`.
         recipients (list[str]): List of recipient email addresses.
-        subject (str): Email subject.
-        body (str): HTML email body.
+        context (dict): Template variables shared by all recipients.
+        personal (dict, optional): Per-recipient variables; if given, each
+            recipient gets an individually rendered message.
+    """
+    deliver(self, template_id, recipients, context, personal)
+
+
+@task(bind=True, base=MailTask)
+def send_bulk_email(
+    self,
+    template_id: str,
+    recipients: list[str],
+    context: dict,
+    personal: Optional[dict[str, dict]] = None,
+):
+    """
+    Sends an email to many recipients on the bulk queue, so large sends never
+    delay transactional mail. Arguments are as for `send_email`.
     """
-    message = create_message(recipients=recipients, subject=subject, body=body)
+    deliver(self, template_id, recipients, context, personal)
+
+
+# =========================
+# Similar books
+# =========================
+# NumPy/SciPy are only imported by the worker, when these tasks first run.
+@task()
+def rebuild_similar_books():
+    """Recompute similar books for the whole catalogue."""
+    from src.books import similar
+
+    similar.rebuild_similar_books()
+
+
+@task()
+def refresh_similar_books():
+    """Recompute similar books for books reviewed or tagged since the last run."""
+    from src.books import similar
+
+    similar.refresh_similar_books()
+
+
+# =========================
+# Review feed
+# =========================
+@task()
+def fan_out_review(review_uid: str):
+    """Push a new review onto its book owner's feed."""
+    from src.reviews import feed
+
+    feed.fan_out_review(review_uid)
+
 
-    # Use async_to_sync to call async FastMail in a sync Celery task
-    async_to_sync(mail.send_message)(message)
+@task()
+def retract_review(review_uid: str, book_uid: str, created_at: str):
+    """Drop a deleted review from its book owner's feed."""
+    from src.reviews import feed
 
-    print(f"✅ Email sent to {recipients}")
+    feed.retract_review(review_uid, book_uid, created_at)
@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -5,6 +7,23 @@ class Settings(BaseSettings):
     # Database
     # =========================
     DATABASE_URL: str
+    # Neon requires TLS; turn off for a local Postgres (e.g. the benchmarks).
+    DB_SSL: bool = True
+    # Log every SQL statement; for local debugging only.
+    DB_ECHO: bool = False
+    # "queue": a per-worker connection pool. "null": open a connection per
+    # checkout, for when pgbouncer (or another external pooler) does the pooling.
+    DB_POOL_MODE: Literal["queue", "null"] = "queue"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    # Connecting through pgbouncer in transaction mode, where consecutive
+    # statements may run on different server connections.
+    DB_PGBOUNCER: bool = False
+    # A pooled connection idle for longer than this is pinged when checked
+    # out; busier ones are trusted, so a loaded worker skips the round trip.
+    DB_PING_IDLE_SECONDS: float = 10.0
 
     # =========================
     # JWT Settings
@@ -17,7 +36,8 @@ class Settings(BaseSettings):
     # =========================
     REDIS_URL: str = "redis://localhost:6379/0"
     CELERY_BROKER_URL: str = REDIS_URL
-    CELERY_RESULT_BACKEND: str = REDIS_URL
+    # Without a socket timeout a call to a hung broker blocks its thread forever.
+    BROKER_SOCKET_TIMEOUT_SECONDS: float = 5.0
 
     # =========================
     # Mail Settings
@@ -32,11 +52,134 @@ class Settings(BaseSettings):
     MAIL_SSL_TLS: bool = False
     USE_CREDENTIALS: bool = True
     VALIDATE_CERTS: bool = True
+    # Delivery retries: exponential backoff with full jitter, capped, before
+    # the mail is moved to the dead-letter queue.
+    MAIL_MAX_RETRIES: int = 5
+    MAIL_RETRY_BACKOFF_SECONDS: int = 10
+    MAIL_RETRY_BACKOFF_MAX_SECONDS: int = 600
+    # Compiled mail templates kept per worker.
+    MAIL_TEMPLATE_CACHE_SIZE: int = 64
+
+    # =========================
+    # Response Compression
+    # =========================
+    # Bodies smaller than this are sent uncompressed. Levels trade CPU for
+    # bytes: gzip 1-9, brotli 0-11 (brotli is used when installed and accepted).
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # =========================
+    # Rate Limiting
+    # =========================
+    # Per-route token buckets as "<requests>/<second|minute|hour>".
+    RATE_LIMITS: dict[str, str] = {
+        "books:list": "120/minute",
+        "auth:login": "10/minute",
+    }
+    # Fraction of a bucket that must be left before a worker stops answering
+    # from its local estimate and asks Redis.
+    RATE_LIMIT_LOCAL_HEADROOM: float = 0.5
+    # Scopes with fewer requests per period than this are never admitted
+    # locally: every request is checked in Redis.
+    RATE_LIMIT_LOCAL_MIN_CAPACITY: int = 100
+
+    # =========================
+    # Admission Control
+    # =========================
+    # In-flight DB-bound requests per worker. Unset, it follows the pool:
+    # DB_POOL_SIZE + DB_MAX_OVERFLOW, or ADMISSION_NULL_POOL_MAX_IN_FLIGHT
+    # when DB_POOL_MODE is "null" and the external pooler bounds connections.
+    ADMISSION_MAX_IN_FLIGHT: Optional[int] = None
+    ADMISSION_NULL_POOL_MAX_IN_FLIGHT: int = 15
+    # Queue wait above which the worker starts shedding, and how long it must
+    # persist first (CoDel target / interval).
+    ADMISSION_TARGET_WAIT_MS: int = 20
+    ADMISSION_INTERVAL_MS: int = 250
+    # Hard cap on how long a request may wait for a slot.
+    ADMISSION_MAX_WAIT_MS: int = 1000
+
+    # =========================
+    # Readiness Probes
+    # =========================
+    # Dependencies are probed in the background every interval; /ready only
+    # reports the last result. Results older than READINESS_STALE_AFTER
+    # intervals count as failed.
+    READINESS_PROBE_INTERVAL_SECONDS: float = 5.0
+    READINESS_PROBE_TIMEOUT_SECONDS: float = 2.0
+    READINESS_STALE_AFTER: int = 3
+    # Pool saturation (checked out / pool size + overflow) above which the
+    # worker reports not ready.
+    READINESS_MAX_POOL_SATURATION: float = 0.9
+
+    # =========================
+    # Idempotency Keys
+    # =========================
+    # How long a response is replayable, how long a duplicate may wait for
+    # the first request to finish, and how often it checks.
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 3600
+    IDEMPOTENCY_LOCK_MS: int = 10000
+    IDEMPOTENCY_POLL_MS: int = 50
+
+    # =========================
+    # Tag Cloud
+    # =========================
+    TAG_CLOUD_SIZE: int = 100
+    TAG_CLOUD_REFRESH_SECONDS: int = 60
+    # Tag catalog cache: Redis (L2) and per-worker (L1) lifetimes. L1 also
+    # bounds how stale another worker's copy can be after an invalidation.
+    TAG_CACHE_TTL_SECONDS: int = 600
+    TAG_CACHE_L1_TTL_SECONDS: int = 5
+
+    # =========================
+    # Books
+    # =========================
+    BOOK_FACETS_CACHE_SECONDS: int = 60
+    # Most uids accepted by one batch request.
+    BOOK_BATCH_MAX_SIZE: int = 100
+    # Most books changed by one bulk update or delete.
+    BOOK_BULK_MAX_SIZE: int = 1000
+
+    # =========================
+    # Similar Books
+    # =========================
+    SIMILAR_BOOKS_K: int = 20
+    # Full rebuild period; stored lists live for two periods so books deleted
+    # since the last rebuild drop out on their own.
+    SIMILAR_BOOKS_REBUILD_SECONDS: int = 24 * 3600
+    # How often books touched by new reviews or tags are recomputed, and how
+    # many of them one refresh takes.
+    SIMILAR_BOOKS_REFRESH_SECONDS: int = 300
+    SIMILAR_BOOKS_REFRESH_BATCH: int = 500
+
+    # =========================
+    # Review Feed
+    # =========================
+    # Newest reviews kept per owner's feed; older pages are read from the DB.
+    FEED_MAX_LEN: int = 500
+    # Owners with more books than this are not fanned out to; their feed is
+    # always queried from the DB.
+    FEED_FANOUT_MAX_BOOKS: int = 1000
+    # Feeds of owners who get no new reviews for this long are dropped.
+    FEED_TTL_SECONDS: int = 30 * 24 * 3600
+
+    # =========================
+    # Leaderboards
+    # =========================
+    # How long a day/week union is reused before it is recomputed.
+    LEADERBOARD_CACHE_SECONDS: int = 60
 
     # =========================
     # App Domain
     # =========================
     DOMAIN: str
+    ALLOWED_HOSTS: list[str] = [
+        "localhost",
+        "127.0.0.1",
+        "0.0.0.0",
+        "bookly-api-dc03.onrender.com",
+        "kuldeepghorpade-fastapi-beyond-crud.duckdns.org",
+    ]
 
     # =========================
     # Pydantic Config
@@ -53,5 +196,4 @@ Config = Settings()
 # Celery Variables (for worker)
 # =========================
 broker_url = Config.CELERY_BROKER_URL
-result_backend = Config.CELERY_RESULT_BACKEND
 broker_connection_retry_on_startup = True
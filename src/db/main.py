@@ -1,36 +1,162 @@
 # src/db/main.py
 
+import time
+import uuid
+from typing import AsyncGenerator, Optional
+
 from sqlmodel import SQLModel
 from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event
+from sqlalchemy.exc import DisconnectionError
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from src.config import Config
-from typing import AsyncGenerator
-
-# Improved async engine for Neon PostgreSQL
-async_engine: AsyncEngine = create_async_engine(
-    Config.DATABASE_URL,
-    echo=True,  # logs SQL statements
-    connect_args={"ssl": True},
-    pool_pre_ping=True,      # tests connection before using it
-    pool_recycle=1800,       # recycles every 30 mins
-    pool_size=5,             # small pool for async apps
-    max_overflow=10          # allows extra connections when needed
-)
-
-# Async session factory
-async_session = sessionmaker(
-    bind=async_engine,
-    class_=AsyncSession,
-    expire_on_commit=False
-)
+
+# The engine and session factory are created per worker process, on first use
+# or by the app lifespan, never at import time: a pool created before a fork
+# would share its sockets between workers.
+async_engine: Optional[AsyncEngine] = None
+async_session: Optional[sessionmaker] = None
+
+
+def connect_args() -> dict:
+    args = {"ssl": Config.DB_SSL}
+    if Config.DB_PGBOUNCER:
+        # In transaction mode a prepared statement may not exist on the next
+        # server connection: turn off asyncpg's and SQLAlchemy's statement
+        # caches, and give the statements asyncpg still prepares unique
+        # names so they never collide on a shared server connection.
+        args.update(
+            statement_cache_size=0,
+            prepared_statement_cache_size=0,
+            prepared_statement_name_func=lambda: f"__asyncpg_{uuid.uuid4()}__",
+        )
+    return args
+
+
+def pool_args() -> dict:
+    if Config.DB_POOL_MODE == "null":
+        return {"poolclass": NullPool}
+    return {
+        "pool_size": Config.DB_POOL_SIZE,
+        "max_overflow": Config.DB_MAX_OVERFLOW,
+        "pool_timeout": Config.DB_POOL_TIMEOUT,
+        "pool_recycle": Config.DB_POOL_RECYCLE,
+        # Instead of a pre-ping round trip on every checkout, only
+        # connections idle for a while are pinged: see `ping_idle_connections`.
+        "pool_pre_ping": False,
+    }
+
+
+def ping_idle_connections(engine: AsyncEngine) -> None:
+    """
+    Ping a pooled connection on checkout if it sat idle for longer than
+    `DB_PING_IDLE_SECONDS`.
+
+    A connection that fails the ping is discarded and the pool hands out
+    another one, as with `pool_pre_ping`. Connections reused within the
+    threshold, i.e. every checkout of a busy worker, skip the round trip.
+    """
+    dialect = engine.dialect
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < Config.DB_PING_IDLE_SECONDS:
+            return
+        try:
+            dialect.do_ping(dbapi_connection)
+        except Exception as e:
+            raise DisconnectionError(f"Idle connection failed its ping: {e}") from e
+
+
+def get_engine() -> AsyncEngine:
+    global async_engine, async_session
+
+    if async_engine is None:
+        async_engine = create_async_engine(
+            Config.DATABASE_URL,
+            echo=Config.DB_ECHO,
+            connect_args=connect_args(),
+            **pool_args(),
+        )
+        if Config.DB_POOL_MODE == "queue":
+            ping_idle_connections(async_engine)
+
+        # Async session factory
+        async_session = sessionmaker(
+            bind=async_engine,
+            class_=AsyncSession,
+            expire_on_commit=False
+        )
+
+    return async_engine
+
+
+def create_task_engine() -> AsyncEngine:
+    """
+    A pool-less engine for work outside the API, such as Celery tasks.
+
+    Each task runs its coroutine on a fresh event loop via `async_to_sync`,
+    and pooled asyncpg connections cannot be reused across loops, so every
+    connection is opened and closed within the task. Dispose it when done.
+    """
+    return create_async_engine(
+        Config.DATABASE_URL,
+        connect_args=connect_args(),
+        poolclass=NullPool,
+    )
+
+
+def new_session() -> AsyncSession:
+    """Open a session on this worker's engine."""
+    get_engine()
+    return async_session()
+
+
+async def warm_engine() -> None:
+    """Open a pooled connection so the first request skips the TLS handshake."""
+    async with get_engine().connect() as conn:
+        await conn.exec_driver_sql("SELECT 1")
+
+
+def pool_stats() -> dict:
+    """How many of this worker's connections are in use, for readiness checks."""
+    if Config.DB_POOL_MODE == "null":
+        # Connections are opened per checkout; the external pooler has the numbers.
+        return {"mode": "null", "saturation": 0.0}
+
+    pool = get_engine().pool
+    checked_out = pool.checkedout()
+    return {
+        "mode": "queue",
+        "size": pool.size(),
+        "checked_out": checked_out,
+        "overflow": max(pool.overflow(), 0),
+        "saturation": round(checked_out / (Config.DB_POOL_SIZE + Config.DB_MAX_OVERFLOW), 3),
+    }
+
+
+async def dispose_engine() -> None:
+    global async_engine, async_session
+
+    if async_engine is not None:
+        await async_engine.dispose()
+    async_engine = None
+    async_session = None
+
 
 # Initialize DB tables
 async def init_db() -> None:
-    async with async_engine.begin() as conn:
+    async with get_engine().begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
 
 # Dependency for FastAPI routes
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
-    async with async_session() as session:
+    async with new_session() as session:
         yield session
@@ -3,6 +3,7 @@ from datetime import date, datetime
 from typing import List, Optional
 
 import sqlalchemy.dialects.postgresql as pg
+from sqlalchemy import Index
 from sqlmodel import Column, Field, Relationship, SQLModel
 
 
@@ -36,6 +37,10 @@ class User(SQLModel, table=True):
 
 
 class BookTag(SQLModel, table=True):
+    __table_args__ = (
+        # The primary key serves book -> tags; this serves tag -> books.
+        Index("ix_booktag_tag_id_book_id", "tag_id", "book_id"),
+    )
     book_id: uuid.UUID = Field(default=None, foreign_key="books.uid", primary_key=True)
     tag_id: uuid.UUID = Field(default=None, foreign_key="tags.uid", primary_key=True)
 
@@ -46,7 +51,13 @@ class Tag(SQLModel, table=True):
         sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
     )
     name: str = Field(sa_column=Column(pg.VARCHAR, nullable=False))
+    # Number of books linked to the tag, maintained when links are added or
+    # removed so popularity never needs a COUNT over `booktag`.
+    book_count: int = Field(
+        default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default="0", index=True)
+    )
     created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
+    update_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
     books: List["Book"] = Relationship(
         link_model=BookTag,
         back_populates="tags",
@@ -59,6 +70,16 @@ class Tag(SQLModel, table=True):
 
 class Book(SQLModel, table=True):
     __tablename__ = "books"
+    __table_args__ = (
+        # Backs keyset pagination of book listings on (created_at, uid),
+        # unfiltered and filtered by each equality facet.
+        Index("ix_books_created_at_uid", "created_at", "uid"),
+        Index("ix_books_language_created_at", "language", "created_at", "uid"),
+        Index("ix_books_publisher_created_at", "publisher", "created_at", "uid"),
+        Index("ix_books_author_created_at", "author", "created_at", "uid"),
+        Index("ix_books_published_date", "published_date"),
+        Index("ix_books_page_count", "page_count"),
+    )
     uid: uuid.UUID = Field(
         sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
     )
@@ -87,6 +108,10 @@ class Book(SQLModel, table=True):
 
 class Review(SQLModel, table=True):
     __tablename__ = "reviews"
+    __table_args__ = (
+        # Backs keyset pagination of a book's reviews on (created_at, uid).
+        Index("ix_reviews_book_uid_created_at", "book_uid", "created_at", "uid"),
+    )
     uid: uuid.UUID = Field(
         sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
     )
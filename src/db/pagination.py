@@ -0,0 +1,56 @@
+import uuid
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import tuple_
+
+from src.errors import InvalidCursor
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+# =========================
+# Cursor encoding
+# =========================
+def encode_cursor(created_at: datetime, uid: uuid.UUID) -> str:
+    """Encode the keyset position of a row as an opaque url-safe cursor."""
+    raw = f"{created_at.isoformat()}|{uid}".encode()
+    return urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """Decode a cursor produced by `encode_cursor`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, uid = urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(uid)
+    except ValueError:
+        raise InvalidCursor()
+
+
+# =========================
+# Keyset pagination
+# =========================
+def keyset_paginate(statement, created_col, uid_col, cursor: Optional[str], limit: int):
+    """
+    Order a select newest first on (created_at, uid) and start it after `cursor`.
+
+    One extra row is fetched so `page_of` can tell whether a next page exists
+    without a separate COUNT query.
+    """
+    if cursor:
+        statement = statement.where(
+            tuple_(created_col, uid_col) < tuple_(*decode_cursor(cursor))
+        )
+    return statement.order_by(created_col.desc(), uid_col.desc()).limit(limit + 1)
+
+
+def page_of(rows: Sequence[Any], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """Split rows fetched by `keyset_paginate` into a page and the next cursor."""
+    items = list(rows[:limit])
+    if len(rows) <= limit:
+        return items, None
+    last = items[-1]
+    return items, encode_cursor(last.created_at, last.uid)
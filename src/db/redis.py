@@ -1,16 +1,75 @@
+from typing import Optional
+
+import redis
 import redis.asyncio as aioredis
 
 from src.config import Config
 
 JTI_EXPIRY = 3600
 
-token_blocklist = aioredis.from_url(Config.REDIS_URL)
+# Created per worker process on first use or by the app lifespan.
+redis_client: Optional[aioredis.Redis] = None
+# Blocking client for Celery tasks, which run outside any event loop.
+sync_redis_client: Optional[redis.Redis] = None
+
+
+def get_redis() -> aioredis.Redis:
+    global redis_client
+
+    if redis_client is None:
+        redis_client = aioredis.from_url(Config.REDIS_URL)
+    return redis_client
+
+
+def get_sync_redis() -> redis.Redis:
+    global sync_redis_client
+
+    if sync_redis_client is None:
+        sync_redis_client = redis.Redis.from_url(Config.REDIS_URL)
+    return sync_redis_client
+
+
+async def close_redis() -> None:
+    global redis_client
+
+    if redis_client is not None:
+        await redis_client.aclose()
+    redis_client = None
+
 
 async def add_jti_to_blocklist(jti: str) -> None:
-    await token_blocklist.set(name=jti, value="", ex=JTI_EXPIRY)
+    await get_redis().set(name=jti, value="", ex=JTI_EXPIRY)
+
+
+def token_generation_key(user_uid: str) -> str:
+    # Never expires: if it did, the counter would restart at 0 and a later
+    # bump could land back on a generation that live tokens still carry.
+    return f"token_generation:{user_uid}"
+
+
+async def get_token_generation(user_uid: str) -> int:
+    generation = await get_redis().get(token_generation_key(user_uid))
+
+    return int(generation) if generation is not None else 0
+
+
+async def bump_token_generation(user_uid: str) -> int:
+    """Invalidate every token issued to the user so far with a single write."""
+    return await get_redis().incr(token_generation_key(user_uid))
+
 
+async def token_revoked(jti: str, user_uid: str, generation: int) -> bool:
+    """
+    Check the JTI blocklist and the user's token generation in one round trip.
 
-async def token_in_blocklist(jti: str) -> bool:
-    jti = await token_blocklist.get(jti)
+    A token is revoked if its JTI was logged out or it was issued before the
+    user's last "log out everywhere".
+    """
+    async with get_redis().pipeline(transaction=False) as pipe:
+        blocked, current_generation = await pipe.get(jti).get(
+            token_generation_key(user_uid)
+        ).execute()
 
-    return jti is not None
\ No newline at end of file
+    if blocked is not None:
+        return True
+    return current_generation is not None and int(current_generation) > generation
@@ -58,12 +58,24 @@ class BookNotFound(BooklyException):
     pass
 
 
+class BookUpdateConflict(BooklyException):
+    """Book was modified since the client last read it"""
+
+    pass
+
+
 class TagNotFound(BooklyException):
     """Tag Not found"""
 
     pass
 
 
+class TagUpdateConflict(BooklyException):
+    """Tag was modified since the client last read it"""
+
+    pass
+
+
 class TagAlreadyExists(BooklyException):
     """Tag already exists"""
 
@@ -76,6 +88,12 @@ class UserNotFound(BooklyException):
     pass
 
 
+class InvalidCursor(BooklyException):
+    """User has provided a malformed pagination cursor"""
+
+    pass
+
+
 class AccountNotVerified(Exception):
     """Account not yet verified"""
     pass
@@ -229,6 +247,42 @@ def register_all_errors(app: FastAPI):
         ),
     )
 
+    app.add_exception_handler(
+        BookUpdateConflict,
+        create_exception_handler(
+            status_code=status.HTTP_409_CONFLICT,
+            initial_detail={
+                "message": "Book was modified by another request",
+                "resolution": "Fetch the book again and retry with its current update_at",
+                "error_code": "book_update_conflict",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        TagUpdateConflict,
+        create_exception_handler(
+            status_code=status.HTTP_409_CONFLICT,
+            initial_detail={
+                "message": "Tag was modified by another request",
+                "resolution": "Fetch the tag again and retry with its current update_at",
+                "error_code": "tag_update_conflict",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        InvalidCursor,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "message": "Pagination cursor is invalid",
+                "resolution": "Use the cursor returned by the previous page",
+                "error_code": "invalid_cursor",
+            },
+        ),
+    )
+
     @app.exception_handler(500)
     async def internal_server_error(request, exc):
 
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import time
+
+from fastapi import APIRouter, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+
+from src.celery_tasks import get_celery
+from src.config import Config
+from src.db.main import get_engine, pool_stats
+from src.db.redis import get_redis
+
+health_router = APIRouter()
+
+
+async def probe_database() -> None:
+    async with get_engine().connect() as conn:
+        await conn.exec_driver_sql("SELECT 1")
+
+
+async def probe_redis() -> None:
+    await get_redis().ping()
+
+
+def ping_broker() -> None:
+    with get_celery().producer_or_acquire() as producer:
+        producer.connection.ensure_connection(max_retries=1)
+        # The broker is Redis: a PING on the producer's channel is a real
+        # round trip, unlike ensure_connection on an open connection.
+        producer.connection.default_channel.client.ping()
+
+
+# The ping in flight, if any. A timed-out probe cancels its await but not the
+# thread, so the next probe waits on the same ping instead of starting another
+# one: a hung broker ties up at most one threadpool thread.
+broker_ping: asyncio.Future | None = None
+
+
+async def probe_broker() -> None:
+    global broker_ping
+
+    if broker_ping is None or broker_ping.done():
+        broker_ping = asyncio.ensure_future(run_in_threadpool(ping_broker))
+        # Nobody may be awaiting it when it ends; don't log its error as unretrieved.
+        broker_ping.add_done_callback(lambda ping: ping.cancelled() or ping.exception())
+    await asyncio.shield(broker_ping)
+
+
+PROBES = {
+    "database": probe_database,
+    "redis": probe_redis,
+    "broker": probe_broker,
+}
+
+
+class ReadinessProbe:
+    """
+    Probes the worker's dependencies in the background at a fixed cadence.
+
+    `/ready` only reads the last report, so load balancer checks never add
+    load to the database or hang on a slow dependency.
+    """
+
+    def __init__(self) -> None:
+        self.report: dict = {}
+        self.probed_at: float | None = None
+
+    async def check(self, name: str, probe) -> dict:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(probe(), Config.READINESS_PROBE_TIMEOUT_SECONDS)
+        except Exception as e:
+            return {"ok": False, "error": str(e) or type(e).__name__}
+        return {"ok": True, "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+    async def refresh(self) -> None:
+        results = await asyncio.gather(
+            *(self.check(name, probe) for name, probe in PROBES.items())
+        )
+        report = dict(zip(PROBES, results))
+
+        pool = pool_stats()
+        pool["ok"] = pool["saturation"] <= Config.READINESS_MAX_POOL_SATURATION
+        report["pool"] = pool
+
+        self.report = report
+        self.probed_at = time.monotonic()
+
+    def status(self) -> tuple[bool, dict]:
+        if self.probed_at is None:
+            return False, {"status": "starting"}
+
+        age = time.monotonic() - self.probed_at
+        fresh = age < Config.READINESS_STALE_AFTER * Config.READINESS_PROBE_INTERVAL_SECONDS
+        ready = fresh and all(check["ok"] for check in self.report.values())
+        return ready, {
+            "status": "ready" if ready else "not_ready",
+            "probed_seconds_ago": round(age, 2),
+            "checks": self.report,
+        }
+
+    async def run(self) -> None:
+        """Probe forever; started by the app lifespan."""
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logging.warning("Readiness probe failed: %s", e)
+            await asyncio.sleep(Config.READINESS_PROBE_INTERVAL_SECONDS)
+
+
+readiness = ReadinessProbe()
+
+
+@health_router.get("/health")
+async def health_check():
+    """Liveness: the worker is up and serving requests."""
+    return {"status": "healthy"}
+
+
+@health_router.get("/ready")
+async def readiness_check():
+    """Readiness: the last background probe found every dependency usable."""
+    ready, report = readiness.status()
+    return JSONResponse(
+        content=report,
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
@@ -0,0 +1,193 @@
+"""
+`Idempotency-Key` support for POST endpoints that clients retry.
+
+The first request with a key runs normally and its response is stored in
+Redis for `IDEMPOTENCY_TTL_SECONDS`; a retry with the same key is answered
+from Redis with a single HGETALL. A short lock serialises concurrent
+duplicates: the second one waits for the first to finish and replays its
+response instead of running the handler again.
+
+Keys are scoped to the authenticated user (or to anonymous callers, for
+signup) and the request path, so a client that refreshes its access token
+between retries still gets a replay. Requests whose token is invalid or
+revoked are passed straight to the handler, which rejects them, and never
+read or store a response. Keys are bound to a fingerprint of the body, so a
+key reused for a different payload is rejected rather than replayed.
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+import uuid
+from typing import Optional
+
+from fastapi import Request, status
+from fastapi.responses import JSONResponse, Response
+from fastapi.security.utils import get_authorization_scheme_param
+from redis.exceptions import RedisError
+from starlette.concurrency import iterate_in_threadpool
+
+from src.auth.utils import decode_token
+from src.config import Config
+from src.db.redis import get_redis, token_revoked
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+IDEMPOTENT_ROUTES = (
+    re.compile(r"^/api/v1/books/?$"),
+    re.compile(r"^/api/v1/reviews/book/[^/]+/?$"),
+    re.compile(r"^/api/v1/auth/signup/?$"),
+)
+
+# Compare-and-delete, so a request whose lock already expired cannot release
+# the lock of the duplicate that took over.
+RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def is_idempotent(request: Request) -> bool:
+    return request.method == "POST" and any(
+        route.match(request.url.path) for route in IDEMPOTENT_ROUTES
+    )
+
+
+async def caller_scope(request: Request) -> Optional[str]:
+    """
+    Who the request is from: the user uid of a valid access token, or
+    "anonymous" without an Authorization header. None if the token is
+    invalid or revoked. Raises RedisError if revocation cannot be checked.
+    """
+    authorization = request.headers.get("authorization")
+    if not authorization:
+        return "anonymous"
+
+    scheme, token = get_authorization_scheme_param(authorization)
+    token_data = decode_token(token) if scheme.lower() == "bearer" else None
+    if token_data is None or token_data["refresh"]:
+        return None
+
+    user_uid = token_data["user"]["user_uid"]
+    if await token_revoked(token_data["jti"], user_uid, token_data.get("gen", 0)):
+        return None
+    return f"user:{user_uid}"
+
+
+def should_store(status_code: int) -> bool:
+    # Server errors and rate limiting are transient: let the retry run again.
+    # Authentication failures never ran the handler, so there is nothing to
+    # replay, and storing one under the anonymous scope would share it.
+    return status_code < 500 and status_code not in (
+        status.HTTP_401_UNAUTHORIZED,
+        status.HTTP_403_FORBIDDEN,
+        status.HTTP_429_TOO_MANY_REQUESTS,
+    )
+
+
+def error_response(message: str, error_code: str, status_code: int) -> JSONResponse:
+    return JSONResponse(
+        content={"message": message, "error_code": error_code},
+        status_code=status_code,
+    )
+
+
+def replay(stored: dict, fingerprint: str) -> Response:
+    if stored[b"fingerprint"].decode() != fingerprint:
+        return error_response(
+            "This Idempotency-Key was already used with a different request",
+            "idempotency_key_reused",
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return Response(
+        content=stored[b"body"],
+        status_code=int(stored[b"status"]),
+        media_type=stored[b"content_type"].decode() or None,
+        headers={REPLAYED_HEADER: "true"},
+    )
+
+
+async def store_response(key: str, response: Response, content: bytes, fingerprint: str) -> None:
+    try:
+        async with get_redis().pipeline(transaction=True) as pipe:
+            pipe.hset(
+                key,
+                mapping={
+                    "status": response.status_code,
+                    "content_type": response.headers.get("content-type", ""),
+                    "fingerprint": fingerprint,
+                    "body": content,
+                },
+            )
+            pipe.expire(key, Config.IDEMPOTENCY_TTL_SECONDS)
+            await pipe.execute()
+    except RedisError as e:
+        logging.warning("Could not store idempotent response: %s", e)
+
+
+async def handle_idempotent(request: Request, call_next):
+    idempotency_key = request.headers.get(IDEMPOTENCY_HEADER)
+    if not idempotency_key or not is_idempotent(request):
+        return await call_next(request)
+
+    try:
+        caller = await caller_scope(request)
+    except RedisError as e:
+        logging.warning("Idempotency store unavailable: %s", e)
+        return await call_next(request)
+    if caller is None:
+        # Let the auth dependency reject it; never replay to a bad token.
+        return await call_next(request)
+
+    body = await request.body()
+    scope = hashlib.sha256(
+        "|".join((caller, request.url.path, idempotency_key)).encode()
+    ).hexdigest()
+    key = f"idempotency:{scope}"
+    lock_key = f"{key}:lock"
+    fingerprint = hashlib.sha256(body).hexdigest()
+    token = uuid.uuid4().hex
+    redis = get_redis()
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + Config.IDEMPOTENCY_LOCK_MS / 1000
+
+    try:
+        # A duplicate in flight holds the lock: wait for its stored response,
+        # or for the lock if it ends without one (e.g. a 5xx).
+        while True:
+            stored = await redis.hgetall(key)
+            if stored:
+                return replay(stored, fingerprint)
+            if await redis.set(lock_key, token, nx=True, px=Config.IDEMPOTENCY_LOCK_MS):
+                break
+            if loop.time() >= deadline:
+                return error_response(
+                    "A request with this Idempotency-Key is still in progress",
+                    "idempotency_request_in_progress",
+                    status.HTTP_409_CONFLICT,
+                )
+            await asyncio.sleep(Config.IDEMPOTENCY_POLL_MS / 1000)
+    except RedisError as e:
+        # Without Redis, process the request as if no key had been sent.
+        logging.warning("Idempotency store unavailable: %s", e)
+        return await call_next(request)
+
+    try:
+        response = await call_next(request)
+        content = b"".join([chunk async for chunk in response.body_iterator])
+        response.body_iterator = iterate_in_threadpool(iter([content]))
+
+        if should_store(response.status_code):
+            await store_response(key, response, content, fingerprint)
+    finally:
+        try:
+            await redis.eval(RELEASE_LUA, 1, lock_key, token)
+        except RedisError:
+            pass  # The lock expires on its own.
+
+    return response
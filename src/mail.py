@@ -1,27 +1,95 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
 from fastapi_mail import FastMail, ConnectionConfig, MessageSchema, MessageType
+from jinja2 import Environment, FileSystemLoader, select_autoescape
 from src.config import Config
 
+TEMPLATE_DIR = Path(__file__).parent / "templates" / "mail"
+
+# Template id -> subject. The body is templates/mail/<id>.html.
+MAIL_TEMPLATES = {
+    "welcome": "Welcome to our app",
+    "verify_email": "Verify Your Email",
+    "account_verified": "Your Account is Verified!",
+    "password_reset": "Reset Your Password",
+}
+
+
 # =========================
-# Mail configuration
+# FastMail instance
 # =========================
-mail_config = ConnectionConfig(
-    MAIL_USERNAME=Config.MAIL_USERNAME,
-    MAIL_PASSWORD=Config.MAIL_PASSWORD,
-    MAIL_FROM=Config.MAIL_FROM,
-    MAIL_PORT=Config.MAIL_PORT,            # use Config value instead of hardcoded 587
-    MAIL_SERVER=Config.MAIL_SERVER,
-    MAIL_FROM_NAME=Config.MAIL_FROM_NAME,
-    MAIL_STARTTLS=Config.MAIL_STARTTLS,
-    MAIL_SSL_TLS=Config.MAIL_SSL_TLS,
-    USE_CREDENTIALS=Config.USE_CREDENTIALS,
-    VALIDATE_CERTS=Config.VALIDATE_CERTS,
-    # TEMPLATE_FOLDER can be added later if needed
-)
+@lru_cache(maxsize=1)
+def get_mail() -> FastMail:
+    """
+    Build the FastMail client once per process, on first use.
+
+    Only the Celery worker sends mail, so API workers never pay for it.
+    """
+    mail_config = ConnectionConfig(
+        MAIL_USERNAME=Config.MAIL_USERNAME,
+        MAIL_PASSWORD=Config.MAIL_PASSWORD,
+        MAIL_FROM=Config.MAIL_FROM,
+        MAIL_PORT=Config.MAIL_PORT,            # use Config value instead of hardcoded 587
+        MAIL_SERVER=Config.MAIL_SERVER,
+        MAIL_FROM_NAME=Config.MAIL_FROM_NAME,
+        MAIL_STARTTLS=Config.MAIL_STARTTLS,
+        MAIL_SSL_TLS=Config.MAIL_SSL_TLS,
+        USE_CREDENTIALS=Config.USE_CREDENTIALS,
+        VALIDATE_CERTS=Config.VALIDATE_CERTS,
+    )
+    return FastMail(config=mail_config)
+
 
 # =========================
-# FastMail instance
+# Templates
 # =========================
-mail = FastMail(config=mail_config)
+@lru_cache(maxsize=1)
+def get_templates() -> Environment:
+    """
+    The worker's Jinja environment.
+
+    Jinja keeps compiled templates in an LRU cache of `cache_size` entries;
+    with `auto_reload` off it never stats the files again, so each template
+    is compiled once per worker process.
+    """
+    return Environment(
+        loader=FileSystemLoader(TEMPLATE_DIR),
+        autoescape=select_autoescape(["html"]),
+        cache_size=Config.MAIL_TEMPLATE_CACHE_SIZE,
+        auto_reload=False,
+    )
+
+
+def precompile_templates() -> None:
+    """Compile every mail template up front, e.g. when a worker process starts."""
+    for template_id in MAIL_TEMPLATES:
+        get_templates().get_template(f"{template_id}.html")
+
+
+def render_messages(
+    template_id: str,
+    recipients: list[str],
+    context: dict,
+    personal: Optional[dict[str, dict]] = None,
+) -> list[MessageSchema]:
+    """
+    Render a template into ready-to-send messages.
+
+    Without `personal`, all recipients share one message. With it, each
+    recipient gets their own message, rendered from the same compiled
+    template with `context` updated by `personal[recipient]`.
+    """
+    subject = MAIL_TEMPLATES[template_id]
+    template = get_templates().get_template(f"{template_id}.html")
+
+    if personal is None:
+        return [create_message(recipients, subject, template.render(context))]
+    return [
+        create_message([recipient], subject, template.render({**context, **personal.get(recipient, {})}))
+        for recipient in recipients
+    ]
 
 # =========================
 # Helper function to create message
@@ -1,47 +1,116 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+
 from src.auth.routes import auth_router
 from src.books.routes import book_router
+from src.celery_tasks import get_celery
+from src.db.main import dispose_engine, warm_engine
+from src.db.redis import close_redis, get_redis
+from src.errors import register_all_errors
+from src.health import health_router, readiness
+from src.metrics import metrics_router
+from src.middleware import register_middleware
 from src.reviews.routes import review_router
 from src.tags.routes import tags_router
+from src.tags.service import popular_tags
+
+version = "v1"
+version_prefix = f"/api/{version}"
+
+
+def warm_broker() -> None:
+    with get_celery().producer_or_acquire() as producer:
+        producer.connection.ensure_connection(max_retries=1)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Open this worker's DB pool, Redis client and broker connection on
+    startup and close them on shutdown.
+
+    Each process builds its own clients here, so preloading the app in a
+    gunicorn master never shares sockets across forked workers. Warm-up
+    failures are logged rather than raised so a worker can still start while
+    a dependency is briefly unavailable.
+    """
+    for name, warm in (
+        ("database", warm_engine),
+        ("redis", get_redis().ping),
+        ("broker", lambda: run_in_threadpool(warm_broker)),
+    ):
+        try:
+            await warm()
+        except Exception as e:
+            logging.warning("Could not warm %s connection: %s", name, e)
+
+    background_tasks = [
+        asyncio.create_task(popular_tags.run()),
+        asyncio.create_task(readiness.run()),
+    ]
+
+    yield
+
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+
+    await dispose_engine()
+    await close_redis()
+    await run_in_threadpool(get_celery().close)
+
+
+def create_app() -> FastAPI:
+    app = FastAPI(
+        title="FastAPI Beyond CRUD - Open Source by Kuldeep Ghorpade",
+        description=(
+            "📘 A production-ready FastAPI project featuring modular architecture, "
+            "authentication, books, reviews, and tags modules.\n\n"
+            "FastAPI Async Beyond CRUD - A production-ready, asynchronous FastAPI backend. Fully containerized with Docker & Docker Compose, secured with Nginx + Certbot (HTTPS). Uses Redis + Celery for background tasks, SQLAlchemy + Alembic for ORM and migrations, Neon PostgreSQL as the production database, with JWT auth, AWS EC2 hosting, and DuckDNS domain \n\n"
+            "🔗 GitHub Repository: https://github.com/kuldeepghorpade05/fastapi-async-beyond-crud.git \n\n"
+            "Maintainer: Kuldeep Ghorpade"
 
-app = FastAPI(
-    title="FastAPI Beyond CRUD - Open Source by Kuldeep Ghorpade",
-    description=(
-        "📘 A production-ready FastAPI project featuring modular architecture, "
-        "authentication, books, reviews, and tags modules.\n\n"
-        "FastAPI Async Beyond CRUD - A production-ready, asynchronous FastAPI backend. Fully containerized with Docker & Docker Compose, secured with Nginx + Certbot (HTTPS). Uses Redis + Celery for background tasks, SQLAlchemy + Alembic for ORM and migrations, Neon PostgreSQL as the production database, with JWT auth, AWS EC2 hosting, and DuckDNS domain \n\n"
-        "🔗 GitHub Repository: https://github.com/kuldeepghorpade05/fastapi-async-beyond-crud.git \n\n"
-        "Maintainer: Kuldeep Ghorpade"
-
-    ),
-    version="1.0.0",
-)
-
-
-# Include routers
-app.include_router(auth_router, prefix="/api/v1/auth")
-app.include_router(book_router, prefix="/api/v1/books")
-app.include_router(review_router, prefix="/api/v1/reviews")
-app.include_router(tags_router, prefix="/api/v1/tags")
-
-# Root endpoint
-@app.get("/")
-async def root():
-    return {
-        "message": (
-            "Hello from Kuldeep Ghorpade, "
-            "Service running successfully! - FastAPI Beyond CRUD"
         ),
-        "version": "1.0.0",
-        "documentation": "/docs",
-        "endpoints": {
-            "auth": "/api/v1/auth",
-            "books": "/api/v1/books",
-            "reviews": "/api/v1/reviews",
-            "tags": "/api/v1/tags"
+        version="1.0.0",
+        license_info={"name": "MIT License", "url": "https://opensource.org/license/mit"},
+        lifespan=lifespan,
+    )
+
+    register_all_errors(app)
+
+    register_middleware(app)
+
+    # Include routers
+    app.include_router(auth_router, prefix=f"{version_prefix}/auth", tags=["auth"])
+    app.include_router(book_router, prefix=f"{version_prefix}/books", tags=["books"])
+    app.include_router(review_router, prefix=f"{version_prefix}/reviews", tags=["reviews"])
+    app.include_router(tags_router, prefix=f"{version_prefix}/tags", tags=["tags"])
+    app.include_router(metrics_router, prefix=f"{version_prefix}/metrics", tags=["metrics"])
+    app.include_router(health_router, tags=["health"])
+
+    # Root endpoint
+    @app.get("/")
+    async def root():
+        return {
+            "message": (
+                "Hello from Kuldeep Ghorpade, "
+                "Service running successfully! - FastAPI Beyond CRUD"
+            ),
+            "version": "1.0.0",
+            "documentation": "/docs",
+            "endpoints": {
+                "auth": f"{version_prefix}/auth",
+                "books": f"{version_prefix}/books",
+                "reviews": f"{version_prefix}/reviews",
+                "tags": f"{version_prefix}/tags"
+            }
         }
-    }
 
-@app.get("/health")
-async def health_check():
-    return {"status": "healthy"}
+    return app
+
+
+app = create_app()
@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+
+from src.admission import admission_controller
+from src.singleflight import read_flights
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get("")
+async def get_metrics():
+    """Per-worker counters for capacity planning and alerting."""
+    return {
+        "admission": admission_controller.stats(),
+        "coalescing": read_flights.stats(),
+    }
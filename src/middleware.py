@@ -1,16 +1,48 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, status
 from fastapi.requests import Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 import time
 import logging
 
+from src.admission import EXEMPT_PATHS, admission_controller
+from src.compression import CompressionMiddleware
+from src.config import Config
+from src.idempotency import handle_idempotent
+
 logger = logging.getLogger("uvicorn.access")
 logger.disabled = True
 
 
 def register_middleware(app: FastAPI):
 
+    @app.middleware("http")
+    async def admission_control(request: Request, call_next):
+        if request.url.path in EXEMPT_PATHS:
+            return await call_next(request)
+
+        if not await admission_controller.acquire():
+            return JSONResponse(
+                content={
+                    "message": "Server is busy, please retry shortly",
+                    "error_code": "server_overloaded",
+                },
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"},
+            )
+
+        try:
+            return await call_next(request)
+        finally:
+            admission_controller.release()
+
+    # Registered after admission control so that it runs first: replays are
+    # answered from Redis without taking an admission slot.
+    @app.middleware("http")
+    async def idempotency(request: Request, call_next):
+        return await handle_idempotent(request, call_next)
+
     @app.middleware("http")
     async def custom_logging(request: Request, call_next):
         start_time = time.time()
@@ -23,6 +55,15 @@ def register_middleware(app: FastAPI):
         print(message)
         return response
 
+    # Outside the idempotency store, so stored responses stay uncompressed and
+    # replays are encoded for whichever client asks.
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=Config.COMPRESSION_MINIMUM_SIZE,
+        gzip_level=Config.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=Config.COMPRESSION_BROTLI_QUALITY,
+    )
+
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
@@ -33,5 +74,5 @@ def register_middleware(app: FastAPI):
 
     app.add_middleware(
         TrustedHostMiddleware,
-        allowed_hosts=["localhost", "127.0.0.1" ,"bookly-api-dc03.onrender.com","0.0.0.0"],
+        allowed_hosts=Config.ALLOWED_HOSTS,
     )
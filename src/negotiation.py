@@ -0,0 +1,201 @@
+"""
+MessagePack content negotiation.
+
+Routers built with `route_class=MsgPackRoute` answer `Accept:
+application/msgpack` with MessagePack instead of JSON, and accept
+MessagePack request bodies. Each route builds its MessagePack response class
+from its `response_model`: fields the schema declares as UUIDs are sent as
+16-byte binaries and datetimes as MessagePack timestamps, instead of 36- and
+26-character strings. Everything else (validation, status codes, error
+responses) goes through FastAPI's normal path.
+"""
+
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+import msgpack
+from fastapi import Request
+from fastapi.responses import Response
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+Converter = Callable[[Any], Any]
+
+
+def accept_qualities(accept: str) -> dict[str, float]:
+    """Media type (or range) -> quality, from an Accept header."""
+    qualities = {}
+    for item in accept.split(","):
+        media_type, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    pass
+        if media_type.strip():
+            qualities[media_type.strip().lower()] = quality
+    return qualities
+
+
+def wants_msgpack(accept: str) -> bool:
+    """
+    True if the client prefers MessagePack over JSON.
+
+    JSON's quality is that of the most specific range naming it. On a tie
+    MessagePack wins only if JSON was accepted through a wildcard, so
+    `application/msgpack, */*` gets MessagePack and
+    `application/json, application/msgpack` keeps JSON.
+    """
+    qualities = accept_qualities(accept)
+    msgpack_q = max((qualities.get(t, 0.0) for t in MSGPACK_MEDIA_TYPES), default=0.0)
+    if msgpack_q <= 0:
+        return False
+
+    if "application/json" in qualities:
+        return msgpack_q > qualities["application/json"]
+    json_q = qualities.get("application/*", qualities.get("*/*", 0.0))
+    return msgpack_q >= json_q
+
+
+# =========================
+# Schema-driven compaction
+# =========================
+def uuid_to_bytes(value: str) -> bytes:
+    return uuid.UUID(value).bytes
+
+
+def datetime_to_timestamp(value: str) -> msgpack.Timestamp:
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        # Models stamp rows with `datetime.now()`, naive in the server's
+        # local time zone; `astimezone` reads them as such.
+        moment = moment.astimezone()
+    return msgpack.Timestamp.from_datetime(moment)
+
+
+FORMAT_CONVERTERS = {"uuid": uuid_to_bytes, "date-time": datetime_to_timestamp}
+
+
+def compile_converter(schema: dict, defs: dict, seen: frozenset = frozenset()) -> Optional[Converter]:
+    """
+    Build a function that compacts the typed fields of a JSON-mode value
+    shaped like `schema`, or None if nothing in it needs converting.
+    """
+    if "$ref" in schema:
+        name = schema["$ref"].rsplit("/", 1)[-1]
+        if name in seen:  # recursive model: leave deeper levels as they are
+            return None
+        return compile_converter(defs[name], defs, seen | {name})
+
+    if schema.get("type") == "string":
+        return FORMAT_CONVERTERS.get(schema.get("format"))
+
+    options = schema.get("anyOf") or schema.get("oneOf")
+    if options:
+        # Optional[X] is the only union the schemas use: convert non-null values as X.
+        converters = [c for c in (compile_converter(o, defs, seen) for o in options) if c]
+        return converters[0] if len(converters) == 1 else None
+
+    if schema.get("type") == "array":
+        item = compile_converter(schema.get("items", {}), defs, seen)
+        if item is None:
+            return None
+        return lambda values: [None if v is None else item(v) for v in values]
+
+    if schema.get("type") == "object":
+        fields = {
+            name: converter
+            for name, field_schema in schema.get("properties", {}).items()
+            if (converter := compile_converter(field_schema, defs, seen))
+        }
+        if not fields:
+            return None
+
+        def convert_object(value: dict) -> dict:
+            for name, converter in fields.items():
+                if value.get(name) is not None:
+                    value[name] = converter(value[name])
+            return value
+
+        return convert_object
+
+    return None
+
+
+def msgpack_response_class(response_model: Any) -> type[Response]:
+    """A response class that packs content shaped like `response_model`."""
+    converter = None
+    if response_model is not None:
+        schema = TypeAdapter(response_model).json_schema(mode="serialization")
+        converter = compile_converter(schema, schema.get("$defs", {}))
+
+    class MsgPackResponse(Response):
+        media_type = "application/msgpack"
+
+        def render(self, content: Any) -> bytes:
+            if converter is not None and content is not None:
+                content = converter(content)
+            return msgpack.packb(content, use_bin_type=True)
+
+    return MsgPackResponse
+
+
+# =========================
+# Request bodies
+# =========================
+class MsgPackRequest(Request):
+    """Presents a MessagePack body to FastAPI as if it were JSON."""
+
+    def __init__(self, request: Request) -> None:
+        scope = dict(request.scope)
+        scope["headers"] = [
+            (key, value) for key, value in request.scope["headers"] if key != b"content-type"
+        ] + [(b"content-type", b"application/json")]
+        super().__init__(scope, request.receive)
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            try:
+                # UUIDs may arrive as 16-byte binaries; pydantic accepts those.
+                self._json = msgpack.unpackb(await self.body(), timestamp=3)
+            except (ValueError, msgpack.UnpackException) as e:
+                # Reported like malformed JSON: a 422 with type json_invalid.
+                raise json.JSONDecodeError(str(e), "", 0)
+        return self._json
+
+
+# =========================
+# Route class
+# =========================
+class MsgPackRoute(APIRoute):
+    def get_route_handler(self):
+        json_handler = super().get_route_handler()
+
+        response_class = self.response_class
+        self.response_class = msgpack_response_class(self.response_model)
+        try:
+            msgpack_handler = super().get_route_handler()
+        finally:
+            self.response_class = response_class
+
+        async def route_handler(request: Request) -> Response:
+            content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+            if content_type in MSGPACK_MEDIA_TYPES:
+                request = MsgPackRequest(request)
+
+            if wants_msgpack(request.headers.get("accept", "")):
+                response = await msgpack_handler(request)
+            else:
+                response = await json_handler(request)
+            # Either way the body depends on Accept, so caches must key on it.
+            response.headers.append("Vary", "Accept")
+            return response
+
+        return route_handler
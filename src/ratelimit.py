@@ -0,0 +1,166 @@
+import logging
+import math
+import time
+from collections import OrderedDict
+
+from fastapi import Request, status
+from fastapi.exceptions import HTTPException
+from redis.exceptions import RedisError
+
+from src.auth.utils import decode_token
+from src.config import Config
+from src.db.redis import get_redis
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+LOCAL_BUCKETS_MAX = 10_000
+LOCAL_SYNC_INTERVAL = 1.0
+
+# Atomic token bucket. Refills from the Redis clock so every worker agrees on
+# time, charges the requests a worker admitted locally since its last sync
+# (`debt`), then tries to take one token for the current request. Debt is
+# charged in full: if workers together admitted more than the bucket held,
+# the balance goes negative and the client is refused until it refills.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local debt = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+tokens = tokens - debt
+
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = (1 - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+-- Keep the key until the bucket would be full again, overdraft included.
+redis.call('EXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate) + 1)
+return {allowed, tostring(tokens), tostring(retry_after)}
+"""
+
+
+def parse_limit(limit: str) -> tuple[int, float]:
+    """Turn "120/minute" into (capacity, refill rate per second)."""
+    count, period = limit.split("/")
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period.strip()]
+
+
+class LocalBucket:
+    """This worker's view of a remote bucket since it last synced with Redis."""
+
+    __slots__ = ("tokens", "synced_at", "debt")
+
+    def __init__(self, tokens: float, synced_at: float) -> None:
+        self.tokens = tokens
+        self.synced_at = synced_at
+        self.debt = 0
+
+
+class RateLimiter:
+    """
+    Dependency enforcing the `Config.RATE_LIMITS` entry for `scope`.
+
+    Clients are keyed by user when the request carries a valid bearer token
+    (unless `per="ip"`), and by client IP otherwise. While a client's last
+    known bucket is well above `RATE_LIMIT_LOCAL_HEADROOM`, requests are
+    admitted from the local estimate and charged to Redis on the next sync,
+    so allowed requests usually skip the Redis round trip entirely. Scopes
+    smaller than `RATE_LIMIT_LOCAL_MIN_CAPACITY` (such as login) always ask
+    Redis, since a few extra admissions per worker matter there.
+    """
+
+    def __init__(self, scope: str, per: str = "user") -> None:
+        self.scope = scope
+        self.per = per
+        self.local: OrderedDict[str, LocalBucket] = OrderedDict()
+        self.script = None
+
+        limit = Config.RATE_LIMITS.get(scope)
+        self.capacity, self.rate = parse_limit(limit) if limit else (0, 0.0)
+        self.headroom = self.capacity * Config.RATE_LIMIT_LOCAL_HEADROOM
+        self.local_admission = self.capacity >= Config.RATE_LIMIT_LOCAL_MIN_CAPACITY
+
+    async def __call__(self, request: Request) -> None:
+        if not self.capacity:
+            return
+
+        key = f"ratelimit:{self.scope}:{self.client_key(request)}"
+        now = time.monotonic()
+
+        bucket = self.local.get(key)
+        if (
+            self.local_admission
+            and bucket is not None
+            and now - bucket.synced_at < LOCAL_SYNC_INTERVAL
+        ):
+            estimate = min(
+                self.capacity, bucket.tokens + (now - bucket.synced_at) * self.rate
+            )
+            if estimate - bucket.debt - 1 >= self.headroom:
+                bucket.debt += 1
+                return
+
+        # Take the debt before awaiting Redis, so concurrent requests of the
+        # same client never send it twice.
+        debt = 0
+        if bucket is not None:
+            debt, bucket.debt = bucket.debt, 0
+
+        redis = get_redis()
+        if self.script is None:
+            self.script = redis.register_script(TOKEN_BUCKET_LUA)
+        try:
+            allowed, tokens, retry_after = await self.script(
+                keys=[key], args=[self.capacity, self.rate, debt], client=redis
+            )
+        except RedisError as e:
+            # Fail open: an unavailable limiter must not take the API down.
+            # The debt is charged on the next successful sync.
+            logging.warning("Rate limiter unavailable: %s", e)
+            current = self.local.get(key)
+            if current is not None:
+                current.debt += debt
+            return
+
+        # Requests admitted locally while the script ran are still owed.
+        synced = LocalBucket(float(tokens), now)
+        current = self.local.get(key)
+        if current is not None:
+            synced.debt = current.debt
+        self.remember(key, synced)
+
+        if not int(allowed):
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(float(retry_after)))},
+            )
+
+    def client_key(self, request: Request) -> str:
+        if self.per == "user":
+            scheme, _, token = request.headers.get("authorization", "").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                token_data = decode_token(token)
+                if token_data:
+                    return f"user:{token_data['user']['user_uid']}"
+
+        # Behind nginx this is the X-Forwarded-For client: uvicorn runs with
+        # --proxy-headers and trusts the proxy's address (FORWARDED_ALLOW_IPS).
+        return f"ip:{request.client.host if request.client else 'unknown'}"
+
+    def remember(self, key: str, bucket: LocalBucket) -> None:
+        self.local[key] = bucket
+        self.local.move_to_end(key)
+        if len(self.local) > LOCAL_BUCKETS_MAX:
+            self.local.popitem(last=False)
@@ -0,0 +1,193 @@
+"""
+Per-owner feed of new reviews on their books (fan-out on write).
+
+Each owner's feed is a Redis sorted set holding the newest `FEED_MAX_LEN`
+reviews of their books. Members are compact JSON arrays, scored by
+`created_at` in microseconds. Both are unique and ordered like
+`keyset_paginate` orders reviews, so one cursor format works for both Redis
+and the database.
+
+A Celery task adds each new review to its owner's feed, seeding the feed
+from the database the first time. Owners with more than
+`FEED_FANOUT_MAX_BOOKS` books have no feed key; they and pages past the cap
+are served from the database (fan-out on read).
+"""
+
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from asgiref.sync import async_to_sync
+from redis.exceptions import RedisError
+from sqlalchemy import func, select
+from sqlalchemy.orm import aliased
+
+from src.config import Config
+from src.db.main import create_task_engine
+from src.db.models import Book, Review
+from src.db.pagination import decode_cursor, encode_cursor
+from src.db.redis import get_redis, get_sync_redis
+
+FEED_KEY = "feed:{}"
+EPOCH = datetime(1970, 1, 1)
+
+# Order matters: the review uid comes first so members with equal scores sort
+# by uid, the same tie-break the database uses.
+FEED_COLUMNS = (
+    Review.uid,
+    Review.book_uid,
+    Book.title.label("book_title"),
+    Review.user_uid,
+    Review.rating,
+    Review.review_text,
+    Review.created_at,
+)
+FEED_FIELDS = tuple(column.key for column in FEED_COLUMNS)
+
+
+def feed_statement(owner_uid):
+    """Reviews of an owner's books, for paginating with `keyset_paginate`."""
+    return (
+        select(*FEED_COLUMNS)
+        .join(Book, Review.book_uid == Book.uid)
+        .where(Book.user_uid == owner_uid)
+    )
+
+
+def feed_score(created_at: datetime) -> int:
+    # Whole microseconds stay exact in a double until the year 2255.
+    return (created_at - EPOCH) // timedelta(microseconds=1)
+
+
+def feed_member(row) -> str:
+    values = [getattr(row, field) for field in FEED_FIELDS]
+    return json.dumps(values, default=str, separators=(",", ":"))
+
+
+def parse_member(member: bytes) -> dict:
+    item = dict(zip(FEED_FIELDS, json.loads(member)))
+    item["uid"] = uuid.UUID(item["uid"])
+    item["created_at"] = datetime.fromisoformat(item["created_at"])
+    return item
+
+
+# =========================
+# Reading (API)
+# =========================
+async def read_feed(owner_uid, cursor: Optional[str], limit: int):
+    """
+    Read a page of the owner's feed from Redis.
+
+    Returns `(items, next_cursor)`, or None when the page has to come from the
+    database: the owner has no feed, or the page reaches past the cap.
+    """
+    key = FEED_KEY.format(owner_uid)
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            pipe.zcard(key)
+            if cursor:
+                created_at, after_uid = decode_cursor(cursor)
+                score = feed_score(created_at)
+                pipe.zrange(key, score, score, byscore=True, desc=True)
+                pipe.zrange(
+                    key, f"({score}", "-inf", byscore=True, desc=True, offset=0, num=limit + 1
+                )
+                size, ties, older = await pipe.execute()
+                items = [item for item in map(parse_member, ties) if item["uid"] < after_uid]
+                items += map(parse_member, older)
+            else:
+                pipe.zrange(key, 0, limit, desc=True)
+                size, newest = await pipe.execute()
+                items = [parse_member(member) for member in newest]
+    except RedisError:
+        logging.warning("Review feed unavailable, reading from the database")
+        return None
+
+    if len(items) > limit:
+        items = items[:limit]
+        return items, encode_cursor(items[-1]["created_at"], items[-1]["uid"])
+    if not size or size >= Config.FEED_MAX_LEN:
+        return None
+    return items, None
+
+
+# =========================
+# Fan-out (Celery worker)
+# =========================
+async def _fan_out(review_uid: str) -> None:
+    client = get_sync_redis()
+    owned = aliased(Book)
+    catalog_size = (
+        select(func.count()).where(owned.user_uid == Book.user_uid).scalar_subquery()
+    )
+
+    engine = create_task_engine()
+    try:
+        async with engine.connect() as conn:
+            result = await conn.execute(
+                select(*FEED_COLUMNS, Book.user_uid.label("owner_uid"), catalog_size.label("catalog_size"))
+                .join(Book, Review.book_uid == Book.uid)
+                .where(Review.uid == review_uid)
+            )
+            review = result.first()
+            if review is None or review.owner_uid is None:
+                return
+
+            key = FEED_KEY.format(review.owner_uid)
+            if review.catalog_size > Config.FEED_FANOUT_MAX_BOOKS:
+                client.delete(key)
+                return
+
+            if client.exists(key):
+                rows = [review]
+            else:
+                # First review since the feed expired: seed it from the DB.
+                result = await conn.execute(
+                    feed_statement(review.owner_uid)
+                    .order_by(Review.created_at.desc(), Review.uid.desc())
+                    .limit(Config.FEED_MAX_LEN)
+                )
+                rows = result.all()
+    finally:
+        await engine.dispose()
+
+    with client.pipeline(transaction=False) as pipe:
+        pipe.zadd(key, {feed_member(row): feed_score(row.created_at) for row in rows})
+        pipe.zremrangebyrank(key, 0, -Config.FEED_MAX_LEN - 1)
+        pipe.expire(key, Config.FEED_TTL_SECONDS)
+        pipe.execute()
+
+
+async def _owner_of(book_uid: str):
+    engine = create_task_engine()
+    try:
+        async with engine.connect() as conn:
+            result = await conn.execute(select(Book.user_uid).where(Book.uid == book_uid))
+            return result.scalar_one_or_none()
+    finally:
+        await engine.dispose()
+
+
+def fan_out_review(review_uid: str) -> None:
+    """Add a new review to its book owner's feed."""
+    async_to_sync(_fan_out)(review_uid)
+
+
+def retract_review(review_uid: str, book_uid: str, created_at: str) -> None:
+    """Remove a deleted review from its book owner's feed."""
+    owner_uid = async_to_sync(_owner_of)(book_uid)
+    if owner_uid is None:
+        return
+
+    client = get_sync_redis()
+    key = FEED_KEY.format(owner_uid)
+    score = feed_score(datetime.fromisoformat(created_at))
+    stale = [
+        member
+        for member in client.zrange(key, score, score, byscore=True)
+        if json.loads(member)[0] == review_uid
+    ]
+    if stale:
+        client.zrem(key, *stale)
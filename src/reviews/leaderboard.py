@@ -0,0 +1,146 @@
+"""
+Review leaderboards: top reviewers and most reviewed books.
+
+Every review increments its reviewer and its book in an hourly Redis sorted
+set and in an all-time one; deleting it decrements them again. The day and
+week windows are ZUNIONSTOREs of the last 24 and 168 hourly buckets, cached
+for `LEADERBOARD_CACHE_SECONDS`. Hourly buckets expire once they fall out of
+the week window.
+
+Redis only holds counts since the sets were first written. To (re)build them
+from the reviews table, e.g. on a fresh Redis:
+
+    python -m src.reviews.leaderboard
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from redis.exceptions import RedisError
+from sqlalchemy import func, select
+
+from src.config import Config
+from src.db.main import create_task_engine
+from src.db.models import Review
+from src.db.redis import close_redis, get_redis
+
+# Board name -> the review column it ranks.
+BOARDS = {"reviewers": Review.user_uid, "books": Review.book_uid}
+WINDOWS = {"day": 24, "week": 7 * 24}
+BUCKET_RETENTION = timedelta(hours=WINDOWS["week"] + 1)
+
+
+def bucket_key(board: str, hour: datetime) -> str:
+    return f"leaderboard:{board}:{hour:%Y%m%d%H}"
+
+
+def all_time_key(board: str) -> str:
+    return f"leaderboard:{board}:all"
+
+
+def window_key(board: str, window: str, hour: datetime) -> str:
+    return f"leaderboard:{board}:{window}:{hour:%Y%m%d%H}"
+
+
+def bucket_expiry(hour: datetime) -> datetime:
+    # An expiry in the past deletes the key, so decrementing a review older
+    # than the week cannot leave an orphaned bucket behind.
+    return hour + BUCKET_RETENTION
+
+
+async def record_review(user_uid, book_uid, created_at: datetime, delta: int) -> None:
+    """Count a created (`delta=1`) or deleted (`delta=-1`) review on every board."""
+    hour = created_at.replace(minute=0, second=0, microsecond=0)
+    members = {"reviewers": user_uid, "books": book_uid}
+
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for board, member in members.items():
+                if member is None:
+                    continue
+                for key in (bucket_key(board, hour), all_time_key(board)):
+                    pipe.zincrby(key, delta, str(member))
+                    if delta < 0:
+                        pipe.zremrangebyscore(key, "-inf", 0)
+                pipe.expireat(bucket_key(board, hour), bucket_expiry(hour))
+            await pipe.execute()
+    except RedisError:
+        logging.warning("Could not update review leaderboards")
+
+
+async def get_leaderboard(board: str, window: str, limit: int) -> list[dict]:
+    """The top `limit` members of a board over a window, highest count first.
+
+    Returns an empty board when Redis is unavailable.
+    """
+    redis = get_redis()
+
+    try:
+        if window == "all":
+            key = all_time_key(board)
+        else:
+            now = datetime.now().replace(minute=0, second=0, microsecond=0)
+            key = window_key(board, window, now)
+            if not await redis.exists(key):
+                buckets = [bucket_key(board, now - timedelta(hours=h)) for h in range(WINDOWS[window])]
+                async with redis.pipeline(transaction=False) as pipe:
+                    pipe.zunionstore(key, buckets)
+                    pipe.expire(key, Config.LEADERBOARD_CACHE_SECONDS)
+                    await pipe.execute()
+
+        entries = await redis.zrange(key, 0, limit - 1, desc=True, withscores=True)
+    except RedisError as e:
+        logging.warning("Review leaderboards unavailable: %s", e)
+        return []
+    return [{"uid": member.decode(), "count": int(score)} for member, score in entries]
+
+
+# =========================
+# Rebuild from the database
+# =========================
+async def rebuild() -> None:
+    redis = get_redis()
+    since = datetime.now().replace(minute=0, second=0, microsecond=0) - BUCKET_RETENTION
+    hour = func.date_trunc("hour", Review.created_at)
+
+    engine = create_task_engine()
+    try:
+        async with engine.connect() as conn:
+            stale = [key async for key in redis.scan_iter(match="leaderboard:*")]
+
+            async with redis.pipeline(transaction=True) as pipe:
+                if stale:
+                    pipe.delete(*stale)
+
+                for board, column in BOARDS.items():
+                    totals = await conn.execute(
+                        select(column, func.count())
+                        .where(column.is_not(None))
+                        .group_by(column)
+                    )
+                    counts = {str(member): n for member, n in totals}
+                    if counts:
+                        pipe.zadd(all_time_key(board), counts)
+
+                    hourly = await conn.execute(
+                        select(column, hour, func.count())
+                        .where(column.is_not(None), Review.created_at >= since)
+                        .group_by(column, hour)
+                    )
+                    buckets: dict = {}
+                    for member, bucket, n in hourly:
+                        buckets.setdefault(bucket, {})[str(member)] = n
+                    for bucket, counts in buckets.items():
+                        pipe.zadd(bucket_key(board, bucket), counts)
+                        pipe.expireat(bucket_key(board, bucket), bucket_expiry(bucket))
+
+                await pipe.execute()
+    finally:
+        await engine.dispose()
+        await close_redis()
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild())
+    print("✅ Review leaderboards rebuilt")
@@ -1,24 +1,77 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query, status, HTTPException
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.auth.dependencies import RoleChecker, get_current_user
 from src.db.main import get_session
 from src.db.models import User
+from src.db.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from src.negotiation import MsgPackRoute
 
-from .schemas import ReviewCreateModel
+from .schemas import LeaderboardModel, ReviewCreateModel, ReviewFeedModel, ReviewPageModel
 from .service import ReviewService
 
 review_service = ReviewService()
-review_router = APIRouter()
+review_router = APIRouter(route_class=MsgPackRoute)
 admin_role_checker = Depends(RoleChecker(["admin"]))
 user_role_checker = Depends(RoleChecker(["user", "admin"]))
 
 
-# Admin-only: get all reviews
-@review_router.get("/", dependencies=[admin_role_checker])
-async def get_all_reviews(session: AsyncSession = Depends(get_session)):
-    reviews = await review_service.get_all_reviews(session)
-    return reviews
+# Admin-only: get all reviews, newest first
+@review_router.get("/", response_model=ReviewPageModel, dependencies=[admin_role_checker])
+async def get_all_reviews(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_session),
+):
+    reviews, next_cursor = await review_service.get_all_reviews(session, cursor, limit)
+    return {"items": reviews, "next_cursor": next_cursor}
+
+
+# Get the reviews of a book, newest first
+@review_router.get(
+    "/book/{book_uid}", response_model=ReviewPageModel, dependencies=[user_role_checker]
+)
+async def get_book_reviews(
+    book_uid: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    min_rating: Optional[int] = Query(None, ge=0, lt=5),
+    max_rating: Optional[int] = Query(None, ge=0, lt=5),
+    session: AsyncSession = Depends(get_session),
+):
+    reviews, next_cursor = await review_service.get_book_reviews(
+        book_uid, session, cursor, limit, min_rating=min_rating, max_rating=max_rating
+    )
+    return {"items": reviews, "next_cursor": next_cursor}
+
+
+# New reviews on the current user's books, newest first
+@review_router.get("/feed", response_model=ReviewFeedModel, dependencies=[user_role_checker])
+async def get_review_feed(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    reviews, next_cursor = await review_service.get_review_feed(
+        current_user.uid, session, cursor, limit
+    )
+    return {"items": reviews, "next_cursor": next_cursor}
+
+
+# Admin-only: top reviewers or most reviewed books over a time window
+@review_router.get(
+    "/leaderboard", response_model=LeaderboardModel, dependencies=[admin_role_checker]
+)
+async def get_leaderboard(
+    board: Literal["reviewers", "books"] = "reviewers",
+    window: Literal["day", "week", "all"] = "week",
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+):
+    entries = await review_service.get_leaderboard(board, window, limit)
+    return {"board": board, "window": window, "entries": entries}
 
 
 # Get a single review by review_uid
@@ -61,12 +114,8 @@ async def delete_review(
     current_user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ):
-    deleted = await review_service.delete_review_to_from_book(
+    # Raises 403 if the review does not exist or belongs to someone else.
+    await review_service.delete_review_to_from_book(
         review_uid=review_uid, user_email=current_user.email, session=session
     )
-    if not deleted:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Review with UID {review_uid} not found or not owned by user"
-        )
     return None
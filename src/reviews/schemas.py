@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -15,6 +15,37 @@ class ReviewModel(BaseModel):
     update_at: datetime
 
 
+class ReviewPageModel(BaseModel):
+    items: List[ReviewModel]
+    next_cursor: Optional[str] = None
+
+
+class ReviewFeedItemModel(BaseModel):
+    uid: uuid.UUID
+    book_uid: uuid.UUID
+    book_title: str
+    user_uid: Optional[uuid.UUID]
+    rating: int
+    review_text: str
+    created_at: datetime
+
+
+class ReviewFeedModel(BaseModel):
+    items: List[ReviewFeedItemModel]
+    next_cursor: Optional[str] = None
+
+
+class LeaderboardEntryModel(BaseModel):
+    uid: uuid.UUID
+    count: int
+
+
+class LeaderboardModel(BaseModel):
+    board: Literal["reviewers", "books"]
+    window: Literal["day", "week", "all"]
+    entries: List[LeaderboardEntryModel]
+
+
 class ReviewCreateModel(BaseModel):
     rating: int = Field(lt=5)
     review_text: str
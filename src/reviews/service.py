@@ -2,18 +2,34 @@ import logging
 
 from fastapi import status
 from fastapi.exceptions import HTTPException
-from sqlmodel import desc, select
+from sqlalchemy import delete
+from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.auth.service import UserService
-from src.books.service import BookService
-from src.db.models import Review
+from src.books.service import BookService, mark_similar_dirty
+from src.celery_tasks import fan_out_review, retract_review
+from src.db.models import Review, User
+from src.db.pagination import keyset_paginate, page_of
 
-from .schemas import ReviewCreateModel
+from .feed import feed_statement, read_feed
+from .leaderboard import get_leaderboard, record_review
+from .schemas import ReviewCreateModel, ReviewModel
 
 book_service = BookService()
 user_service = UserService()
 
+# Listing reviews only needs the `ReviewModel` columns as plain rows.
+REVIEW_LIST_COLUMNS = tuple(getattr(Review, name) for name in ReviewModel.model_fields)
+
+
+def enqueue(task, *args) -> None:
+    """Queue a follow-up task for a write that has already been committed."""
+    try:
+        task.delay(*args)
+    except Exception as e:
+        logging.exception(e)
+
 
 class ReviewService:
     async def add_review_to_book(
@@ -50,6 +66,10 @@ class ReviewService:
             # Refresh to get DB-generated fields
             await session.refresh(new_review)
 
+            await mark_similar_dirty(book.uid)
+            enqueue(fan_out_review, str(new_review.uid))
+            await record_review(user.uid, book.uid, new_review.created_at, 1)
+
             return new_review
 
         except Exception as e:
@@ -64,22 +84,95 @@ class ReviewService:
         result = await session.exec(statement)
         return result.first()
 
-    async def get_all_reviews(self, session: AsyncSession):
-        statement = select(Review).order_by(desc(Review.created_at))
+    async def get_all_reviews(
+        self, session: AsyncSession, cursor: str | None, limit: int
+    ):
+        statement = keyset_paginate(
+            select(*REVIEW_LIST_COLUMNS), Review.created_at, Review.uid, cursor, limit
+        )
+        result = await session.exec(statement)
+        return page_of(result.all(), limit)
+
+    async def get_book_reviews(
+        self,
+        book_uid: str,
+        session: AsyncSession,
+        cursor: str | None,
+        limit: int,
+        min_rating: int | None = None,
+        max_rating: int | None = None,
+    ):
+        statement = select(*REVIEW_LIST_COLUMNS).where(Review.book_uid == book_uid)
+        if min_rating is not None:
+            statement = statement.where(Review.rating >= min_rating)
+        if max_rating is not None:
+            statement = statement.where(Review.rating <= max_rating)
+
+        statement = keyset_paginate(
+            statement, Review.created_at, Review.uid, cursor, limit
+        )
+        result = await session.exec(statement)
+        return page_of(result.all(), limit)
+
+    async def get_user_reviews_page(
+        self, user_uid: str, session: AsyncSession, cursor: str | None, limit: int
+    ):
+        statement = keyset_paginate(
+            select(*REVIEW_LIST_COLUMNS).where(Review.user_uid == user_uid),
+            Review.created_at, Review.uid, cursor, limit,
+        )
+        result = await session.exec(statement)
+        return page_of(result.all(), limit)
+
+    async def get_review_feed(
+        self, owner_uid, session: AsyncSession, cursor: str | None, limit: int
+    ):
+        """New reviews on the owner's books, from their Redis feed when it has the page."""
+        page = await read_feed(owner_uid, cursor, limit)
+        if page is not None:
+            return page
+
+        statement = keyset_paginate(
+            feed_statement(owner_uid), Review.created_at, Review.uid, cursor, limit
+        )
         result = await session.exec(statement)
-        return result.all()
+        return page_of(result.all(), limit)
+
+    async def get_leaderboard(self, board: str, window: str, limit: int):
+        return await get_leaderboard(board, window, limit)
 
     async def delete_review_to_from_book(
         self, review_uid: str, user_email: str, session: AsyncSession
     ):
-        user = await user_service.get_user_by_email(user_email, session)
-        review = await self.get_review(review_uid, session)
+        # Ownership is checked in the DELETE itself, so this is one round trip.
+        statement = (
+            delete(Review)
+            .where(
+                Review.uid == review_uid,
+                Review.user_uid == select(User.uid).where(User.email == user_email).scalar_subquery(),
+            )
+            .returning(Review.uid, Review.book_uid, Review.user_uid, Review.created_at)
+        )
+        result = await session.exec(statement)
+        deleted_review = result.first()
 
-        if not review or (review.user != user):
+        if not deleted_review:
             raise HTTPException(
                 detail="Cannot delete this review",
                 status_code=status.HTTP_403_FORBIDDEN,
             )
 
-        session.delete(review)
         await session.commit()
+
+        await record_review(
+            deleted_review.user_uid, deleted_review.book_uid, deleted_review.created_at, -1
+        )
+        if deleted_review.book_uid is not None:
+            await mark_similar_dirty(deleted_review.book_uid)
+            enqueue(
+                retract_review,
+                str(deleted_review.uid),
+                str(deleted_review.book_uid),
+                deleted_review.created_at.isoformat(),
+            )
+        return deleted_review
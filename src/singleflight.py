@@ -0,0 +1,78 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from src.db.main import new_session
+
+
+class Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one execution.
+
+    The first caller starts the work as its own task and later callers await
+    the same task. Each caller waits through `asyncio.shield`, so a cancelled
+    request (e.g. a client disconnect) only stops its own wait; the shared
+    work is cancelled only once no caller is left waiting on it.
+    """
+
+    def __init__(self) -> None:
+        self._flights: Dict[Hashable, Flight] = {}
+        self.calls = 0
+        self.executions = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+
+        flight = self._flights.get(key)
+        if flight is None:
+            self.executions += 1
+            flight = Flight(asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    def _forget(self, key: Hashable, flight: Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "in_flight": len(self._flights),
+            "coalescing_ratio": 1 - self.executions / self.calls if self.calls else 0.0,
+        }
+
+
+read_flights = SingleFlight()
+
+
+async def coalesced_read(key: Hashable, fn: Callable[..., Awaitable[Any]], *args) -> Any:
+    """
+    Run the idempotent service read `fn(*args, session)` once for all
+    concurrent callers sharing `key`.
+
+    The shared read gets its own session so it does not depend on the
+    lifetime of whichever request happened to start it.
+    """
+
+    async def run():
+        async with new_session() as session:
+            return await fn(*args, session)
+
+    return await read_flights.do(key, run)
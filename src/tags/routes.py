@@ -1,28 +1,61 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, status
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 
 from src.auth.dependencies import RoleChecker
-from src.books.schemas import Book
+from src.books.schemas import Book, BookPageModel
+from src.books.service import BookService
 from src.db.main import get_session
+from src.db.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from src.errors import TagNotFound
 
-from .schemas import TagAddModel, TagCreateModel, TagModel
-from .service import TagService
+from src.config import Config
+from src.negotiation import MsgPackRoute
 
-tags_router = APIRouter()
+from .schemas import PopularTagModel, TagAddModel, TagCreateModel, TagModel
+from .service import TagService, popular_tags
+
+tags_router = APIRouter(route_class=MsgPackRoute)
 tag_service = TagService()
+book_service = BookService()
 user_role_checker = Depends(RoleChecker(["user", "admin"]))
 
 
 @tags_router.get("/", response_model=List[TagModel], dependencies=[user_role_checker])
-async def get_all_tags(session: AsyncSession = Depends(get_session)):
-    tags = await tag_service.get_tags(session)
+async def get_all_tags():
+    tags = await tag_service.get_tags()
 
     return tags
 
 
+@tags_router.get(
+    "/popular", response_model=List[PopularTagModel], dependencies=[user_role_checker]
+)
+async def get_popular_tags(limit: int = Query(20, ge=1, le=Config.TAG_CLOUD_SIZE)):
+    return await popular_tags.get(limit)
+
+
+@tags_router.get(
+    "/{tag_uid}/books", response_model=BookPageModel, dependencies=[user_role_checker]
+)
+async def get_tag_books(
+    tag_uid: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_session),
+):
+    books, next_cursor = await book_service.get_tag_books(tag_uid, session, cursor, limit)
+
+    # Only an empty first page needs to tell "no books" from "no such tag".
+    if not books and not cursor and not await tag_service.get_tag_by_uid(tag_uid, session):
+        raise TagNotFound()
+
+    return {"items": books, "next_cursor": next_cursor}
+
+
 @tags_router.post(
     "/",
     response_model=TagModel,
@@ -58,9 +91,14 @@ async def add_tags_to_book(
 async def update_tag(
     tag_uid: str,
     tag_update_data: TagCreateModel,
+    expected_update_at: Optional[datetime] = Query(
+        None, description="Only update if the tag's update_at still has this value"
+    ),
     session: AsyncSession = Depends(get_session),
 ) -> TagModel:
-    updated_tag = await tag_service.update_tag(tag_uid, tag_update_data, session)
+    updated_tag = await tag_service.update_tag(
+        tag_uid, tag_update_data, session, expected_update_at=expected_update_at
+    )
 
     return updated_tag
 
@@ -9,6 +9,13 @@ class TagModel(BaseModel):
     uid: uuid.UUID
     name: str
     created_at: datetime
+    update_at: datetime
+
+
+class PopularTagModel(BaseModel):
+    uid: uuid.UUID
+    name: str
+    book_count: int
 
 
 class TagCreateModel(BaseModel):
@@ -1,16 +1,37 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import List, Optional
+
 from fastapi import status
 from fastapi.exceptions import HTTPException
+from pydantic import TypeAdapter
+from sqlalchemy import delete, func, update
 from sqlmodel import desc, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.books.service import BookService
-from src.db.models import Tag
+from src.books.service import BookService, mark_similar_dirty
+from src.cache import TwoTierCache
+from src.config import Config
+from src.db.main import new_session
+from src.db.models import BookTag, Tag
 
-from .schemas import TagAddModel, TagCreateModel
-from src.errors import BookNotFound, TagNotFound, TagAlreadyExists
+from .schemas import PopularTagModel, TagAddModel, TagCreateModel, TagModel
+from src.errors import BookNotFound, TagNotFound, TagAlreadyExists, TagUpdateConflict
 
 book_service = BookService()
 
+# Listing tags only needs the `TagModel` columns, not each tag's books.
+TAG_LIST_COLUMNS = tuple(getattr(Tag, name) for name in TagModel.model_fields)
+
+# Tags change rarely and are read on every tag listing and lookup.
+tag_cache = TwoTierCache(
+    "tags",
+    ttl=Config.TAG_CACHE_TTL_SECONDS,
+    l1_ttl=Config.TAG_CACHE_L1_TTL_SECONDS,
+)
+
 
 server_error = HTTPException(
     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Something went wrong"
@@ -19,10 +40,11 @@ server_error = HTTPException(
 
 class TagService:
 
+    @tag_cache.cached(TypeAdapter(List[TagModel]))
     async def get_tags(self, session: AsyncSession):
         """Get all tags"""
 
-        statement = select(Tag).order_by(desc(Tag.created_at))
+        statement = select(*TAG_LIST_COLUMNS).order_by(desc(Tag.created_at))
 
         result = await session.exec(statement)
 
@@ -38,7 +60,13 @@ class TagService:
         if not book:
             raise BookNotFound()
 
+        linked = {tag.name for tag in book.tags}
+        new_links = []
         for tag_item in tag_data.tags:
+            if tag_item.name in linked:
+                continue
+            linked.add(tag_item.name)
+
             result = await session.exec(select(Tag).where(Tag.name == tag_item.name))
 
             tag = result.one_or_none()
@@ -46,11 +74,39 @@ class TagService:
                 tag = Tag(name=tag_item.name)
 
             book.tags.append(tag)
+            new_links.append(tag)
         session.add(book)
+
+        if new_links:
+            await session.flush()
+            # Increment in SQL so concurrent links to the same tag don't race.
+            await session.exec(
+                update(Tag)
+                .where(Tag.uid.in_([tag.uid for tag in new_links]))
+                .values(book_count=Tag.book_count + 1)
+            )
         await session.commit()
         await session.refresh(book)
+
+        if new_links:
+            await tag_cache.invalidate()
+            await mark_similar_dirty(book.uid)
         return book
 
+    async def get_popular_tags(self, session: AsyncSession, limit: int):
+        """Get the most used tags with their book counts"""
+
+        statement = (
+            select(Tag.uid, Tag.name, Tag.book_count)
+            .order_by(desc(Tag.book_count), Tag.name)
+            .limit(limit)
+        )
+
+        result = await session.exec(statement)
+
+        return [PopularTagModel.model_validate(row, from_attributes=True) for row in result]
+
+    @tag_cache.cached(TypeAdapter(Optional[TagModel]))
     async def get_tag_by_uid(self, tag_uid: str, session: AsyncSession):
         """Get tag by uid"""
 
@@ -76,27 +132,48 @@ class TagService:
         session.add(new_tag)
 
         await session.commit()
+        await tag_cache.invalidate()
 
         return new_tag
 
     async def update_tag(
-        self, tag_uid, tag_update_data: TagCreateModel, session: AsyncSession
+        self,
+        tag_uid,
+        tag_update_data: TagCreateModel,
+        session: AsyncSession,
+        expected_update_at: Optional[datetime] = None,
     ):
-        """Update a tag"""
+        """
+        Update a tag with a single `UPDATE ... RETURNING`.
 
-        tag = await self.get_tag_by_uid(tag_uid, session)
+        With `expected_update_at` the update only applies if the tag has not
+        changed since the client read it, otherwise `TagUpdateConflict` is
+        raised.
+        """
 
-        if not tag:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+        statement = update(Tag).where(Tag.uid == tag_uid)
+        if expected_update_at is not None:
+            statement = statement.where(Tag.update_at == expected_update_at)
+        statement = statement.values(
+            **tag_update_data.model_dump(), update_at=datetime.now()
+        ).returning(*TAG_LIST_COLUMNS)
 
-        update_data_dict = tag_update_data.model_dump()
+        result = await session.exec(statement)
 
-        for k, v in update_data_dict.items():
-            setattr(tag, k, v)
+        tag = result.first()
 
-            await session.commit()
+        await session.commit()
 
-            await session.refresh(tag)
+        if not tag:
+            # Only a failed conditional update needs a second query, to tell a
+            # missing tag from a stale one.
+            if expected_update_at is not None:
+                result = await session.exec(select(Tag.uid).where(Tag.uid == tag_uid))
+                if result.first() is not None:
+                    raise TagUpdateConflict()
+            raise TagNotFound()
+
+        await tag_cache.invalidate()
 
         return tag
 
@@ -104,10 +181,63 @@ class TagService:
     async def delete_tag(self, tag_uid: str, session: AsyncSession):
         """Delete a tag"""
 
-        tag = await self.get_tag_by_uid(tag_uid, session)  # await the async fetch
+        # Unlink the tag from its books in the same statement; foreign keys
+        # are checked once both deletes have run. The unlinked books come
+        # back with the tag for the similarity refresh.
+        unlinked = (
+            delete(BookTag)
+            .where(BookTag.tag_id == tag_uid)
+            .returning(BookTag.book_id)
+            .cte("unlinked_books")
+        )
+        deleted = delete(Tag).where(Tag.uid == tag_uid).returning(Tag.uid).cte("deleted_tag")
+        statement = select(
+            deleted.c.uid,
+            select(func.array_agg(unlinked.c.book_id)).scalar_subquery().label("book_uids"),
+        ).add_cte(unlinked)
 
-        if not tag:
+        result = await session.exec(statement)
+        deleted_tag = result.first()
+
+        if not deleted_tag:
             raise TagNotFound()
 
-        await session.delete(tag)
         await session.commit()
+        if deleted_tag.book_uids:
+            await mark_similar_dirty(*deleted_tag.book_uids)
+        await tag_cache.invalidate()
+
+
+class PopularTagsCache:
+    """
+    The top `Config.TAG_CLOUD_SIZE` tags, refreshed in the background.
+
+    Tag clouds are read far more often than tag links change, so requests are
+    served from this per-worker snapshot and never query the database.
+    """
+
+    def __init__(self) -> None:
+        self.tags: list[PopularTagModel] = []
+        self.refreshed_at: float | None = None
+
+    async def refresh(self) -> None:
+        async with new_session() as session:
+            self.tags = await TagService().get_popular_tags(session, Config.TAG_CLOUD_SIZE)
+        self.refreshed_at = time.monotonic()
+
+    async def get(self, limit: int) -> list[PopularTagModel]:
+        if self.refreshed_at is None:
+            await self.refresh()
+        return self.tags[:limit]
+
+    async def run(self) -> None:
+        """Refresh forever; started by the app lifespan."""
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logging.warning("Could not refresh popular tags: %s", e)
+            await asyncio.sleep(Config.TAG_CLOUD_REFRESH_SECONDS)
+
+
+popular_tags = PopularTagsCache()